@@ -1,272 +1,19 @@
 import streamlit as st
-import pandas as pd
-import PyPDF2
-import json
-from typing import Dict, Any, List, Optional 
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from embeddings import EMBEDDING_WARMUP, embedding_cache_stats, embedding_version, warmup
+from fast_path import router
+import utils
+from pdf_pages import page_cache
 from qa_system import ResumeQASystem
-from utils import groq_generate 
-import streamlit.components.v1 as components
-
-def read_resume(uploaded_file) -> str:
-    """Extract text from uploaded resume file"""
-    if uploaded_file.type == "application/pdf":
-        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        text = " ".join([page.extract_text() for page in pdf_reader.pages if page.extract_text()])
-    else:
-        text = uploaded_file.getvalue().decode()
-    return text
-
-def parse_llm_response(text: str) -> Dict[str, Any]:
-    """Parse the LLM response with improved work experience handling and certificates section"""
-    sections = {
-       "Basic Info": {  # Changed to nested structure for basic info
-            "Name": "",
-            "Email": "",
-            "Phone": ""
-        },
-        "Profile Summary": "",
-        "Work Experience": [],  # Changed to list to store multiple experiences
-        "Education": "",
-        "Technical Skills": "",
-        "Projects": [],
-        "Certificates": ""  # Added certificates section
-    }
-    
-    section_markers = {
-        "name:": ("Basic Info", "Name"),
-        "email:": ("Basic Info", "Email"),
-        "phone:": ("Basic Info", "Phone"),
-        "phone number:": ("Basic Info", "Phone"),
-        "profile summary:": ("Profile Summary", None),
-        "summary:": ("Profile Summary", None),
-        "work experience:": ("Work Experience", None),
-        "employment:": ("Work Experience", None),
-        "education:": ("Education", None),
-        "technical skills:": ("Technical Skills", None),
-        "skills:": ("Technical Skills", None),
-        "projects:": ("Projects", None),
-        "certificates:": ("Certificates", None),
-        "certifications:": ("Certificates", None)
-    }
-    
-    lines = text.split('\n')
-    current_section = None
-    current_subsection = None
-    section_content = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        line_lower = line.lower()
-        
-        # Check if this line starts a new section
-        new_section = None
-        new_subsection = None
-        for marker, (section, subsection) in section_markers.items():
-            if line_lower.startswith(marker):
-                new_section = section
-                new_subsection = subsection
-                content = line[len(marker):].strip()
-                break
-        
-        if new_section:
-            # Save content from previous section if it exists
-            if current_section and section_content:
-                if current_section == "Work Experience":
-                    sections[current_section] = parse_work_experience('\n'.join(section_content))
-                elif current_section == "Projects":
-                    sections[current_section] = parse_projects('\n'.join(section_content))
-                elif current_section == "Basic Info" and current_subsection:
-                    sections[current_section][current_subsection] = '\n'.join(section_content).strip()
-                else:
-                    sections[current_section] = '\n'.join(section_content).strip()
-            
-            # Start new section
-            current_section = new_section
-            current_subsection = new_subsection
-            section_content = [content] if content else []
-        elif current_section:
-            # Add line to current section
-            section_content.append(line)
-    
-    # Save the last section's content
-    if current_section and section_content:
-        if current_section == "Work Experience":
-            sections[current_section] = parse_work_experience('\n'.join(section_content))
-        elif current_section == "Projects":
-            sections[current_section] = parse_projects('\n'.join(section_content))
-        elif current_section == "Basic Info" and current_subsection:
-            sections[current_section][current_subsection] = '\n'.join(section_content).strip()
-        else:
-            sections[current_section] = '\n'.join(section_content).strip()
-    
-    return sections
-
-def parse_work_experience(text: str) -> List[Dict[str, Any]]:
-    """Parse work experience with improved company and responsibility detection"""
-    experiences = []
-    current_exp = None
-    current_responsibilities = []
-    
-    lines = text.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-        
-        # Check for new company entry (starts with bullet or contains date in parentheses)
-        if (line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and 
-            ('(' in line and ')' in line)) or \
-           (not line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and 
-            '(' in line and ')' in line):
-            
-            # Save previous experience if exists
-            if current_exp and current_responsibilities:
-                current_exp['responsibilities'] = current_responsibilities
-                experiences.append(current_exp)
-            
-            # Clean up the line
-            if line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
-                line = line[1:].strip()
-            
-            # Parse company info
-            try:
-                company_part, date_part = line.split('(', 1)
-                date_part = date_part.rstrip(')')
-                
-                # Split location if present
-                if ',' in date_part:
-                    date_info, location = date_part.rsplit(',', 1)
-                else:
-                    date_info, location = date_part, ""
-                
-                current_exp = {
-                    'company': company_part.strip(),
-                    'duration': date_info.strip(),
-                    'location': location.strip(),
-                    'responsibilities': []
-                }
-                current_responsibilities = []
-            except ValueError:
-                # Handle malformed lines
-                current_exp = {
-                    'company': line,
-                    'duration': '',
-                    'location': '',
-                    'responsibilities': []
-                }
-                current_responsibilities = []
-        
-        # Check for responsibility
-        elif line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and current_exp:
-            resp = line.lstrip('•-*○·►▪➢ ').strip()
-            if resp:
-                current_responsibilities.append(resp)
-        
-        i += 1
-    
-    # Add final experience
-    if current_exp and current_responsibilities:
-        current_exp['responsibilities'] = current_responsibilities
-        experiences.append(current_exp)
-    
-    return experiences
-
-def parse_projects(text: str) -> List[Dict[str, Any]]:
-    """Parse projects into structured format"""
-    projects = []
-    current_project = None
-    current_details = []
-    
-    lines = text.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-        
-        # Check if line starts with bullet and might be a project title
-        if line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
-            clean_line = line.lstrip('•-*○·►▪➢ ').strip()
-            
-            # If current line doesn't contain "Technologies:" and next lines have bullets,
-            # it's likely a project title
-            is_title = True
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if next_line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
-                    if "technologies:" in clean_line.lower() or \
-                       "developed" in clean_line.lower() or \
-                       "implemented" in clean_line.lower() or \
-                       "built" in clean_line.lower():
-                        is_title = False
-            
-            if is_title:
-                # Save previous project if exists
-                if current_project and current_details:
-                    current_project['details'] = current_details
-                    projects.append(current_project)
-                
-                # Start new project
-                current_project = {
-                    'title': clean_line,
-                    'details': []
-                }
-                current_details = []
-            elif current_project:
-                current_details.append(clean_line)
-        
-        i += 1
-    
-    # Add final project
-    if current_project and current_details:
-        current_project['details'] = current_details
-        projects.append(current_project)
-    
-    return projects
-
-def extract_info(resume_text: str) -> Dict[str, Any]:
-    """Extract information with improved prompt for projects"""
-    prompt = f"""
-    Please analyze the following resume and extract the information in this exact format with clear section headers:
-
-    Name: [Full Name]
-    Email: [Email Address]
-    Phone: [Phone Number]
-    Profile Summary: [Detailed profile summary]
-    Work Experience: [List each position in this format:
-    • Company Name (Duration, Location)
-    * Responsibility 1
-    * Responsibility 2
-    * Responsibility 3
-    ]
-    Education: [Detailed education history]
-    Technical Skills: [List of technical skills]
-    Projects: [List each project in this format:
-    * Project Title
-    * Detail 1
-    * Detail 2
-    * Technologies: List of technologies used
-    ]
-    Certificates: [List of certificates and certifications]
-
-    Important: 
-    - For Work Experienc or experience, first try to find company name and then find bullet points below it. Maintain the bullet point format exactly as shown above. Do this for every company you can find.
-    - For Projects, ensure each project title is on its own line with a bullet point, followed by details on separate lines
-
-    Resume Text: {resume_text}
-    """
-    
-    raw_extracted_text = groq_generate(prompt)
-    parsed_data = parse_llm_response(raw_extracted_text)
-    return parsed_data
+from resume_cache import ResumeCache, content_key
+from resume_parser import PARSER_VERSION, iter_resume_pages
+from semantic_cache import answer_cache_stats
+from service_client import SERVICE_URL, ServiceClient, ServiceError
+from session_store import SessionStore
+from telemetry import TELEMETRY_DEBUG_PANEL, span, start_http_server, telemetry, user_action
+from upload_pipeline import UploadPipeline
 
 def display_section_content(section: str, data: Dict[str, Any]):
     """Display section content with combined basic info"""
@@ -301,25 +48,243 @@ def display_section_content(section: str, data: Dict[str, Any]):
         st.write(f"**{section}:**")
         st.write(content)
 
+def render_answer(placeholder, answer: str):
+    """Render the (possibly partial) answer inside the answer box"""
+    # ✅ Answer box with single border
+    placeholder.markdown(
+        f"""
+        <div style="
+            border-left: 4px solid #4CAF50;
+            padding: 12px;
+            border-radius: 8px;
+            background-color: #1e1e1e;
+            color: white;
+            margin-top: 10px;
+            font-size: 16px;
+            line-height: 1.6;
+        ">
+            <b>📄 Answer:</b><br> {answer}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+@st.cache_resource
+def start_embedding_warmup():
+    """Load the shared embedding model in the background once per server process"""
+    return warmup()
+
+@st.cache_resource
+def get_resume_cache() -> ResumeCache:
+    """Process-wide resume cache shared by all sessions"""
+    # Entries hold a saved index, which only loads with the embeddings that built it
+    return ResumeCache(version=f"{PARSER_VERSION}/{embedding_version()}")
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """Process-wide store of every session's QA system, bounded by SESSION_MEMORY_BUDGET_MB"""
+    return SessionStore()
+
+@st.cache_resource
+def start_telemetry():
+    """Register cache statistics and start the Prometheus endpoint once per server process"""
+    telemetry.register_collector("resume_cache", lambda: get_resume_cache().stats())
+    telemetry.register_collector("llm_response_cache", lambda: utils.response_cache.stats())
+    telemetry.register_collector("fast_path", router.stats)
+    telemetry.register_collector("semantic_answer_cache", answer_cache_stats.stats)
+    telemetry.register_collector("embedding_cache", embedding_cache_stats)
+    telemetry.register_collector("pdf_page_cache", lambda: {"hits": page_cache.hits, "misses": page_cache.misses})
+    telemetry.register_collector("sessions", lambda: get_session_store().stats())
+    return start_http_server()
+
+@st.cache_resource
+def get_service_client() -> ServiceClient:
+    """Client of the resume service, used instead of in-process processing when SERVICE_URL is set"""
+    return ServiceClient(SERVICE_URL)
+
+def process_resume_remote(uploaded_file, upload_key: str, client: ServiceClient):
+    """Upload a resume to the service, which skips resumes it already has, and wait for the results"""
+    with span("upload.service"):
+        # The resume id covers the service's parser and embedding versions, so the service assigns it
+        resume_id = client.upload(uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)["resume_id"]
+        with st.spinner("⏳ Processing resume..."):
+            job = client.wait_until_processed(resume_id)
+    st.session_state.index_ready = True
+    st.session_state.extracted_data = job["extracted_data"]
+    st.session_state.resume_key = resume_id
+    st.session_state.upload_key = upload_key
+
+@contextmanager
+def session_qa_system():
+    """This session's QA system, reloaded if it was evicted; None in thin-client mode or once expired"""
+    if SERVICE_URL:
+        yield None
+        return
+    with get_session_store().use(st.session_state.session_id) as qa_system:
+        yield qa_system
+
+def answer_stream(question: str, qa_system: Optional[ResumeQASystem]):
+    """Answer pieces from the service in thin-client mode, otherwise from the session's QA system"""
+    if SERVICE_URL:
+        return get_service_client().ask_stream(st.session_state.resume_key, question)
+    if qa_system is None:
+        return iter(["Please process a resume first."])
+    return qa_system.answer_question_stream(question)
+
+STAGE_LABELS = {"text": "📄 Reading resume", "index": "🔎 Building search index",
+                "extraction": "🧠 Extracting sections"}
+PROGRESS_INTERVAL = 0.5
+
+def process_resume(uploaded_file, cache_key: str, cache: ResumeCache):
+    """Load a resume from the cache, or start the upload pipeline that processes and caches it"""
+    # A fresh QA system, so a pipeline still running for a previous upload cannot touch this one
+    qa_system = ResumeQASystem()
+    get_session_store().remove(st.session_state.session_id)
+    st.session_state.index_ready = False
+    st.session_state.extracted_data = None
+    st.session_state.upload_error = None
+    st.session_state.resume_key = cache_key
+    with span("upload.cache_lookup"):
+        cached = cache.get(cache_key)
+    # A miss is recorded as one "upload" action by the pipeline, so only a hit opens one here
+    if cached:
+        with user_action("upload"):
+            with span("upload.index_load"):
+                if cached["index_path"]:
+                    qa_system.load_knowledge_base(cached["index_path"])
+                else:
+                    qa_system.create_knowledge_base(cached["resume_text"])
+            qa_system.set_candidate_skills(cached["skills"])
+            qa_system.set_extracted_data(cached["extracted_data"])
+            get_session_store().put(st.session_state.session_id, qa_system)
+            st.session_state.index_ready = True
+            st.session_state.extracted_data = cached["extracted_data"]
+            return
+
+    def store(pipeline: UploadPipeline):
+        with span("upload.cache_store"):
+            cache.put(cache_key, pipeline.resume_text, pipeline.extracted_data, pipeline.qa_system,
+                      skills=pipeline.skills)
+
+    # Indexing and LLM extraction run concurrently; each tab opens as soon as its own stage is done
+    st.session_state.pipeline = UploadPipeline(iter_resume_pages(uploaded_file), qa_system,
+                                               on_complete=store).start()
+
+def sync_pipeline_state() -> bool:
+    """Copy the results of finished pipeline stages into the session; True if anything changed"""
+    pipeline = st.session_state.pipeline
+    changed = False
+    if pipeline.ready("index") and not st.session_state.index_ready:
+        # The pipeline still caches the index when it finishes, so keep it in memory until then
+        get_session_store().put(st.session_state.session_id, pipeline.qa_system,
+                                busy=lambda: not pipeline.finished)
+        st.session_state.index_ready = True
+        changed = True
+    if pipeline.ready("extraction") and st.session_state.extracted_data is None:
+        st.session_state.extracted_data = pipeline.extracted_data
+        changed = True
+    if pipeline.finished:
+        st.session_state.pipeline = None
+        st.session_state.upload_error = pipeline.error
+        changed = True
+    return changed
+
+def display_pipeline_progress():
+    """Progress bar per pipeline stage; reruns the whole app when a stage finishes"""
+    pipeline = st.session_state.pipeline
+    if pipeline is None:
+        return
+    for name, label in STAGE_LABELS.items():
+        stage = pipeline.stages[name]
+        if stage.status == "error":
+            st.progress(stage.fraction, text=f"❌ {label}")
+            continue
+        detail = f"{stage.completed}/{stage.total} pages" if name != "extraction" and stage.total else ""
+        status = "✅" if stage.status == "done" else ("⏳" if stage.status == "running" else "🕓")
+        st.progress(stage.fraction, text=f"{status} {label} {detail} ({stage.seconds:.1f}s)")
+    if sync_pipeline_state():
+        st.rerun()
+
+def display_debug_panel():
+    """Sidebar panel with the process-wide telemetry snapshot"""
+    # pandas is only needed here, so it is not imported on every cold start
+    import pandas as pd
+    snapshot = telemetry.snapshot()
+    with st.expander("🔧 Debug: latency & usage"):
+        st.write("**Stages (seconds)**")
+        st.dataframe(pd.DataFrame(snapshot["stages"]).T)
+        if snapshot["llm"]:
+            st.write("**LLM calls per call site**")
+            st.dataframe(pd.DataFrame({
+                site: {k: v for k, v in values.items() if not isinstance(v, dict)}
+                for site, values in snapshot["llm"].items()
+            }).T)
+        st.write("**LLM calls per user action**")
+        st.json(snapshot["llm_calls_per_action"])
+        st.write("**Caches**")
+        st.json(snapshot["collectors"])
+        st.write("**Sessions (memory in bytes)**")
+        st.dataframe(pd.DataFrame(get_session_store().report()))
+
 def main():
 
     st.set_page_config(page_title="📄 AI Resume Screening", layout="wide")
 
-    if "qa_system" not in st.session_state:
-        st.session_state.qa_system = ResumeQASystem()
-    if "resume_text" not in st.session_state:
-        st.session_state.resume_text = None
+    start_telemetry()
+
+    # The QA system itself lives in the process-wide SessionStore, keyed by this id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "index_ready" not in st.session_state:
+        st.session_state.index_ready = False
     if "extracted_data" not in st.session_state:
         st.session_state.extracted_data = None
+    if "resume_key" not in st.session_state:
+        st.session_state.resume_key = None
+    if "upload_key" not in st.session_state:
+        st.session_state.upload_key = None
+    if "pipeline" not in st.session_state:
+        st.session_state.pipeline = None
+    if "upload_error" not in st.session_state:
+        st.session_state.upload_error = None
+    session_store = get_session_store()
+    # Sessions idle for longer than SESSION_IDLE_TTL are dropped; process the uploaded file again
+    if st.session_state.index_ready and not SERVICE_URL and st.session_state.session_id not in session_store:
+        st.session_state.resume_key = None
 
     with st.sidebar:
         st.header("📂 Upload Resume")
         uploaded_file = st.file_uploader("Choose a resume", type=['pdf', 'txt'])
-        if uploaded_file:
-            st.session_state.resume_text = read_resume(uploaded_file)
-            st.session_state.extracted_data = extract_info(st.session_state.resume_text)
-            st.session_state.qa_system.create_knowledge_base(st.session_state.resume_text)
+        if uploaded_file and SERVICE_URL:
+            upload_key = content_key(uploaded_file.getvalue())
+            if st.session_state.upload_key != upload_key:
+                try:
+                    with user_action("upload"):
+                        process_resume_remote(uploaded_file, upload_key, get_service_client())
+                except ServiceError as e:
+                    st.error(f"❌ {e}")
+                    st.stop()
             st.success("✅ Resume processed successfully!")
+        elif uploaded_file:
+            cache = get_resume_cache()
+            cache_key = cache.make_key(uploaded_file.getvalue())
+            # Reruns triggered by other widgets keep the already processed resume
+            if st.session_state.resume_key != cache_key:
+                process_resume(uploaded_file, cache_key, cache)
+            if st.session_state.pipeline is not None:
+                st.fragment(display_pipeline_progress, run_every=PROGRESS_INTERVAL)()
+            elif st.session_state.upload_error:
+                st.error(f"❌ {st.session_state.upload_error}")
+            else:
+                st.success("✅ Resume processed successfully!")
+            stats = cache.stats()
+            st.caption(f"Resume cache: {stats['hits']} hits / {stats['misses']} misses")
+            memory = session_store.stats()
+            st.caption(f"Memory: {session_store.session_bytes(st.session_state.session_id) / 1e6:.1f} MB this session, "
+                       f"{memory['bytes'] / 1e6:.1f} MB across {memory['sessions']} sessions, "
+                       f"{embedding_cache_stats()['bytes'] / 1e6:.1f} MB embedding cache")
+        if TELEMETRY_DEBUG_PANEL:
+            display_debug_panel()
 
     st.header("🕵️ AI Detective: Investigate This Resume")
     tab1, tab2 = st.tabs(["🤖 AI-Powered Analysis", "📜 Resume Breakdown"])
@@ -330,11 +295,13 @@ def main():
                         "Technical Skills", "Projects", "Certificates"]
             selected_section = st.selectbox("📌 Select Section:", sections)
             display_section_content(selected_section, st.session_state.extracted_data)
+        elif st.session_state.pipeline is not None:
+            st.info("⏳ Extracting resume sections... The breakdown appears here as soon as it is ready.")
         else:
             st.warning("⚠️ Please upload a resume first.")
 
     with tab1:
-        if st.session_state.resume_text:
+        if st.session_state.index_ready:
             
             st.markdown(
                 """
@@ -352,27 +319,19 @@ def main():
 
             # ✅ Answer display logic
             if submitted and question:
-                with st.spinner("🤖 Thinking..."):
-                    answer = st.session_state.qa_system.answer_question(question)
-
-                # ✅ Answer box with single border
-                st.markdown(
-                    f"""
-                    <div style="
-                        border-left: 4px solid #4CAF50;
-                        padding: 12px;
-                        border-radius: 8px;
-                        background-color: #1e1e1e;
-                        color: white;
-                        margin-top: 10px;
-                        font-size: 16px;
-                        line-height: 1.6;
-                    ">
-                        <b>📄 Answer:</b><br> {answer}
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
+                answer_box = st.empty()
+                with user_action("question"), session_qa_system() as qa_system:
+                    stream = answer_stream(question, qa_system)
+                    try:
+                        # Keep the spinner until the first piece arrives, then render as tokens stream in
+                        with st.spinner("🤖 Thinking..."):
+                            answer = next(stream, "")
+                        render_answer(answer_box, answer)
+                        for piece in stream:
+                            answer += piece
+                            render_answer(answer_box, answer)
+                    except ServiceError as e:
+                        st.error(f"❌ {e}")
 
             # 🎨 **Improved Styling (Centered, Single Border)**
             st.markdown(
@@ -387,9 +346,16 @@ def main():
                 unsafe_allow_html=True,
             )
 
+        elif st.session_state.pipeline is not None:
+            st.info("⏳ Building the search index... You can ask questions as soon as it is ready.")
         else:
             st.warning("⚠️ Please upload a resume first.")
 
+    # Started after the page is laid out, so the first render does not wait on the ML imports.
+    # In thin-client mode the service embeds and indexes, so the model is never loaded here.
+    if EMBEDDING_WARMUP and not SERVICE_URL:
+        start_embedding_warmup()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,292 @@
+"""Bulk resume ingestion.
+
+Usage:
+    python batch_ingest.py resumes/ --output results.jsonl --concurrency 8
+    python batch_ingest.py campaign.zip --output results.jsonl --index-dir indexes/
+
+PDF text is extracted in a process pool and the LLM extraction runs in a
+thread pool of --concurrency workers. Text extraction is much faster than
+the LLM calls, so at most --max-in-flight resumes (twice --concurrency by
+default) are read ahead, and the text of the rest is not held in memory.
+One JSON record is appended to the output file per resume as soon as it
+finishes. Re-running with the same output file skips resumes that already
+have a successful record.
+
+With --corpus-dir or --ranking-dir, successful records are held back until
+the corpus and ranking data are saved, every CHECKPOINT_EVERY resumes and at
+the end. An interrupted run therefore never leaves an "ok" record for a
+resume whose vectors were not written, and the next run processes it again.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from resume_parser import extract_resume, read_resume
+
+SUPPORTED_TYPES = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+}
+
+# Successful resumes between saves of the corpus and ranking data
+CHECKPOINT_EVERY = int(os.getenv("BATCH_CHECKPOINT_EVERY", "50"))
+
+# A source is either ("file", path) or ("zip", archive path, member name)
+Source = Tuple[str, ...]
+
+
+class ResumeFile:
+    """Minimal stand-in for a Streamlit UploadedFile so read_resume can be reused"""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.type = SUPPORTED_TYPES[os.path.splitext(name)[1].lower()]
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+def iter_sources(input_path: str) -> Iterator[Tuple[str, Source]]:
+    """Yield (resume id, source) for every supported file in a directory or zip archive"""
+    if zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as archive:
+            for name in sorted(archive.namelist()):
+                if os.path.splitext(name)[1].lower() in SUPPORTED_TYPES:
+                    yield name, ("zip", input_path, name)
+        return
+
+    for root, dirs, files in os.walk(input_path):
+        dirs.sort()
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1].lower() in SUPPORTED_TYPES:
+                path = os.path.join(root, file_name)
+                yield os.path.relpath(path, input_path), ("file", path)
+
+
+def load_text(source: Source) -> Tuple[str, str, float]:
+    """Read a resume and extract its text. Runs inside the process pool."""
+    start = time.perf_counter()
+    if source[0] == "zip":
+        with zipfile.ZipFile(source[1]) as archive:
+            name, data = source[2], archive.read(source[2])
+    else:
+        name = source[1]
+        with open(name, "rb") as f:
+            data = f.read()
+    # Files are already spread over the process pool, so extract each one serially
+    text = read_resume(ResumeFile(name, data), workers=1)
+    return hashlib.sha256(data).hexdigest(), text, time.perf_counter() - start
+
+
+def load_finished(output_path: str) -> Set[str]:
+    """Return the ids of resumes that already have a successful record"""
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                finished.add(record["resume_id"])
+    return finished
+
+
+class Ingestor:
+    """Runs LLM extraction and optional index building for one resume at a time"""
+
+    def __init__(self, index_dir: Optional[str] = None, corpus=None, ranking=None):
+        self.index_dir = index_dir
+        self.corpus = corpus
+        self.ranking = ranking
+        self._local = threading.local()
+
+    def _qa_system(self):
+        # Each worker thread gets its own ResumeQASystem so indexes never mix
+        if not hasattr(self._local, "qa_system"):
+            from qa_system import ResumeQASystem
+            self._local.qa_system = ResumeQASystem()
+        return self._local.qa_system
+
+    def process(self, resume_id: str, file_hash: str, text: str) -> Dict[str, Any]:
+        timings = {}
+        start = time.perf_counter()
+        extracted_data, skills = extract_resume(text)
+        timings["llm_extraction"] = time.perf_counter() - start
+
+        index_path = None
+        if self.index_dir:
+            start = time.perf_counter()
+            qa_system = self._qa_system()
+            qa_system.create_knowledge_base(text)
+            index_path = os.path.join(self.index_dir, file_hash)
+            qa_system.save_knowledge_base(index_path)
+            timings["index_build"] = time.perf_counter() - start
+
+        if self.corpus is not None:
+            start = time.perf_counter()
+            self.corpus.add_resume(resume_id, extracted_data)
+            timings["corpus_add"] = time.perf_counter() - start
+
+        if self.ranking is not None:
+            start = time.perf_counter()
+            self.ranking.add_resume(resume_id, extracted_data, skills=skills)
+            timings["ranking_add"] = time.perf_counter() - start
+
+        return {
+            "resume_id": resume_id,
+            "sha256": file_hash,
+            "status": "ok",
+            "extracted_data": extracted_data,
+            "skills": skills,
+            "index_path": index_path,
+            "timings": timings,
+        }
+
+
+def run(input_path: str, output_path: str, concurrency: int, pdf_workers: Optional[int],
+        index_dir: Optional[str], corpus_dir: Optional[str] = None,
+        ranking_dir: Optional[str] = None, max_in_flight: Optional[int] = None) -> Dict[str, Any]:
+    finished = load_finished(output_path)
+    pending = [(rid, src) for rid, src in iter_sources(input_path) if rid not in finished]
+    print(f"{len(finished)} resumes already done, {len(pending)} to process", file=sys.stderr)
+
+    corpus = None
+    if corpus_dir:
+        from corpus_index import CorpusIndex
+        corpus = CorpusIndex(corpus_dir)
+    ranking = None
+    if ranking_dir:
+        from ranking import RankingEngine
+        ranking = RankingEngine(ranking_dir)
+    ingestor = Ingestor(index_dir, corpus, ranking)
+    stage_totals = {"text_extraction": 0.0, "llm_extraction": 0.0, "index_build": 0.0,
+                    "corpus_add": 0.0, "ranking_add": 0.0}
+    counts = {"ok": 0, "error": 0}
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as llm_pool:
+
+        def write(record: Dict[str, Any]):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            for stage, seconds in record.get("timings", {}).items():
+                stage_totals[stage] += seconds
+
+        # Successful records whose corpus and ranking data are not on disk yet
+        unsaved: List[Dict[str, Any]] = []
+
+        def checkpoint():
+            if corpus is not None:
+                corpus.save()
+            if ranking is not None:
+                ranking.save()
+            for record in unsaved:
+                write(record)
+            unsaved.clear()
+
+        text_futures: Dict[Any, str] = {}
+        llm_futures: Dict[Any, Tuple[str, float]] = {}
+        sources = iter(pending)
+        max_in_flight = max(max_in_flight or concurrency * 2, 1)
+
+        def read_ahead():
+            # Resumes between text extraction and their record count against max_in_flight
+            while len(text_futures) + len(llm_futures) < max_in_flight:
+                source = next(sources, None)
+                if source is None:
+                    return
+                rid, src = source
+                text_futures[pdf_pool.submit(load_text, src)] = rid
+
+        read_ahead()
+        while text_futures or llm_futures:
+            done, _ = wait(list(text_futures) + list(llm_futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in text_futures:
+                    rid = text_futures.pop(future)
+                    try:
+                        file_hash, text, seconds = future.result()
+                    except Exception as e:
+                        write({"resume_id": rid, "status": "error", "stage": "text_extraction",
+                               "error": str(e)})
+                        continue
+                    llm_futures[llm_pool.submit(ingestor.process, rid, file_hash, text)] = (rid, seconds)
+                else:
+                    rid, text_seconds = llm_futures.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        write({"resume_id": rid, "status": "error", "stage": "processing",
+                               "error": str(e)})
+                        continue
+                    record["timings"]["text_extraction"] = text_seconds
+                    if corpus is None and ranking is None:
+                        write(record)
+                        continue
+                    unsaved.append(record)
+                    if len(unsaved) >= CHECKPOINT_EVERY:
+                        checkpoint()
+            read_ahead()
+
+        checkpoint()
+
+    elapsed = time.perf_counter() - start
+    processed = counts["ok"] + counts["error"]
+    return {
+        "processed": processed,
+        "ok": counts["ok"],
+        "errors": counts["error"],
+        "skipped": len(finished),
+        "elapsed_seconds": elapsed,
+        "resumes_per_minute": processed / elapsed * 60 if elapsed else 0.0,
+        "stage_seconds": stage_totals,
+    }
+
+
+def print_summary(summary: Dict[str, Any]):
+    print(f"Processed {summary['processed']} resumes ({summary['ok']} ok, {summary['errors']} errors, "
+          f"{summary['skipped']} skipped) in {summary['elapsed_seconds']:.1f}s")
+    print(f"Throughput: {summary['resumes_per_minute']:.1f} resumes/min")
+    print("Per-stage time (summed over workers):")
+    for stage, seconds in summary["stage_seconds"].items():
+        mean = seconds / summary["ok"] if summary["ok"] else 0.0
+        print(f"  {stage:<16} total {seconds:8.1f}s   mean {mean:6.2f}s/resume")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract structured data from a folder or zip of resumes")
+    parser.add_argument("input", help="Directory or .zip archive containing PDF/TXT resumes")
+    parser.add_argument("--output", default="results.jsonl", help="JSON Lines file to append results to")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent LLM extraction calls")
+    parser.add_argument("--pdf-workers", type=int, default=None, help="Processes used for PDF text extraction")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Most resumes read ahead of their record (default: twice --concurrency)")
+    parser.add_argument("--index-dir", default=None, help="Also build and save a FAISS index per resume here")
+    parser.add_argument("--corpus-dir", default=None, help="Also add every resume to the shared corpus index here")
+    parser.add_argument("--ranking-dir", default=None, help="Also store skill sets for ranking.py here")
+    args = parser.parse_args(argv)
+
+    if args.index_dir:
+        os.makedirs(args.index_dir, exist_ok=True)
+    summary = run(args.input, args.output, args.concurrency, args.pdf_workers, args.index_dir,
+                  args.corpus_dir, args.ranking_dir, args.max_in_flight)
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
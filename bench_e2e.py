@@ -0,0 +1,260 @@
+"""Offline end-to-end benchmark of the resume pipeline.
+
+Usage:
+    python bench_e2e.py --resumes 50 --output bench.json
+    python bench_e2e.py --resumes 50 --compare bench.json --threshold 0.15
+    python bench_e2e.py --replay recordings.json --latency 0.5 --tokens-per-second 250
+
+Groq is replaced by llm_stub.StubGroqClient (no network, configurable latency
+and token rate, optional replay of recorded responses). Embeddings default to
+the deterministic hash backend. Every stage is timed on a corpus of
+synthetic PDF resumes, and the results are written as JSON so that two
+commits can be compared with --compare.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import embeddings
+import utils
+from batch_ingest import ResumeFile
+from llm_cache import NullResponseCache
+from llm_stub import AsyncStubGroqClient, StubGroqClient, load_recordings
+from rate_limit import RateLimiter
+from semantic_cache import answer_cache_stats
+from fast_path import router
+from telemetry import telemetry
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Divya", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas"]
+LAST_NAMES = ["Kumar", "Smith", "Li", "Patel", "Garcia", "Haddad", "Okafor", "Sato", "Silva", "Weber"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Tech"]
+CITIES = ["Bengaluru", "London", "Remote", "New York", "Berlin", "Singapore"]
+SKILLS = ["Python", "Java", "SQL", "AWS", "Docker", "Kubernetes", "React", "JavaScript",
+          "Machine Learning", "Spark", "Airflow", "Terraform", "Pandas", "TensorFlow", "Go"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Implemented", "Scaled"]
+OBJECTS = ["data pipelines", "REST services", "a recommendation engine", "CI/CD workflows",
+           "the analytics platform", "customer dashboards", "model training jobs", "search infrastructure"]
+
+QUESTIONS = [
+    "Does this candidate have experience with Python?",
+    "What certifications does the candidate have?",
+    "How many years of experience does the candidate have?",
+]
+ROLE_QUESTION = "Is this candidate suitable for a Data Engineer role needing Python, Spark, Airflow and AWS?"
+
+
+def synthetic_resume(rng: random.Random, jobs: int = 3, projects: int = 2) -> str:
+    """A resume written in the same layout as the extraction prompt's output"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(4, 9))
+    lines = [
+        f"Name: {name}",
+        f"Email: {name.lower().replace(' ', '.')}@example.com",
+        f"Phone: +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        f"Profile Summary: Engineer with {rng.randint(2, 15)} years of experience in {', '.join(skills[:3])}.",
+        "Work Experience:",
+    ]
+    for _ in range(jobs):
+        start = rng.randint(2008, 2020)
+        lines.append(f"- {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)}, {rng.choice(CITIES)})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f"* {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}")
+    lines.append(f"Education: B.Tech in Computer Science, {rng.randint(2004, 2018)}")
+    lines.append(f"Technical Skills: {', '.join(skills)}")
+    lines.append("Projects:")
+    for i in range(projects):
+        lines.append(f"* Project {i + 1}: {rng.choice(OBJECTS).title()}")
+        lines.append(f"* {rng.choice(VERBS)} {rng.choice(OBJECTS)}")
+        lines.append(f"* Technologies: {', '.join(rng.sample(skills, 2))}")
+    lines.append(f"Certificates: {rng.choice(['AWS Solutions Architect', 'CKA', 'None listed'])}")
+    return "\n".join(lines)
+
+
+def make_pdf(text: str, lines_per_page: int = 40) -> bytes:
+    """Write a minimal multi-page PDF with one Helvetica text line per input line"""
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    lines = text.split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({escape(line)}) Tj T*" for line in page_lines) + " ET"
+        stream_bytes = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class StageTimer:
+    """Collects wall-clock samples per stage name"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            result[stage] = {
+                "count": len(values),
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "total_s": sum(values),
+            }
+        return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub = StubGroqClient(load_recordings(args.replay), latency=args.latency,
+                          tokens_per_second=args.tokens_per_second)
+    utils.use_clients(stub, lambda: AsyncStubGroqClient(stub))
+    # Caching and client-side rate limiting would hide the cost being measured
+    utils.set_response_cache(NullResponseCache())
+    utils.rate_limiter = RateLimiter(0, 0)
+    embeddings.set_default_backend(args.embeddings)
+
+    from qa_system import ResumeQASystem
+    from resume_parser import extract_resume, iter_resume_pages, parse_llm_response, read_resume
+    from upload_pipeline import UploadPipeline
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_resume(rng, jobs=rng.randint(2, 6), projects=rng.randint(1, 4))
+              for _ in range(args.resumes)]
+    files = [ResumeFile(f"resume_{i}.pdf", make_pdf(text)) for i, text in enumerate(corpus)]
+
+    timer = StageTimer()
+    qa_system = ResumeQASystem()
+    # Load the embedding model outside the timed stages
+    qa_system.embeddings.embed_query("warmup")
+
+    start = time.perf_counter()
+    for resume_file in files:
+        with timer.time("read_resume"):
+            text = read_resume(resume_file, workers=args.pdf_workers)
+        with timer.time("extract_info"):
+            extracted_data, skills = extract_resume(text)
+        with timer.time("parse_llm_response"):
+            parse_llm_response(text)
+        with timer.time("create_knowledge_base"):
+            qa_system.create_knowledge_base(text)
+        # The upload flow of the app, where indexing and extraction overlap instead of adding up
+        with timer.time("upload_pipeline"):
+            UploadPipeline(iter_resume_pages(resume_file, workers=args.pdf_workers), ResumeQASystem()).start().wait()
+        qa_system.set_candidate_skills(skills)
+        qa_system.set_extracted_data(extracted_data)
+        for question in QUESTIONS:
+            with timer.time("answer_question"):
+                qa_system.answer_question(question)
+        context = qa_system._retrieve_context(ROLE_QUESTION)
+        with timer.time("evaluate_role_suitability"):
+            qa_system._evaluate_role_suitability(ROLE_QUESTION, context)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "config": vars(args),
+        },
+        "elapsed_s": elapsed,
+        "resumes_per_minute": len(files) / elapsed * 60 if elapsed else 0.0,
+        "llm_calls": stub.calls,
+        "stages": timer.summary(),
+        "fast_path": router.stats(),
+        "semantic_answer_cache": answer_cache_stats.stats(),
+        "telemetry": telemetry.snapshot(),
+    }
+
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Print per-stage mean deltas against a baseline; return False on any regression"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    ok = True
+    print(f"{'stage':<28}{'baseline ms':>14}{'current ms':>14}{'delta':>10}")
+    for stage, current in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            print(f"{stage:<28}{'-':>14}{current['mean_ms']:>14.2f}{'new':>10}")
+            continue
+        delta = (current["mean_ms"] - before["mean_ms"]) / before["mean_ms"] if before["mean_ms"] else 0.0
+        flag = " !" if delta > threshold else ""
+        ok = ok and delta <= threshold
+        print(f"{stage:<28}{before['mean_ms']:>14.2f}{current['mean_ms']:>14.2f}{delta:>+9.1%}{flag}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=20, help="Number of synthetic resumes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub LLM fixed latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Stub LLM generation rate")
+    parser.add_argument("--replay", default=None, help="JSON file of recorded responses keyed by prompt hash")
+    parser.add_argument("--embeddings", default="hash", choices=sorted(embeddings.BACKENDS),
+                        help="Embedding backend (hash is deterministic and model-free)")
+    parser.add_argument("--pdf-workers", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this file")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown of a stage mean that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Throughput and retrieval-drift benchmark for the embedding backends.
+
+Usage:
+    python bench_embeddings.py --resumes 200 --backends huggingface,onnx,onnx-int8
+    python bench_embeddings.py --batch-size 64 --threads 4 --output embeddings.json
+
+Chunks synthetic resumes with the same splitter as ResumeQASystem, then
+encodes every chunk with each backend. It reports chunks/sec cold and then
+through CachedEmbeddings, where boilerplate chunks repeated across resumes
+are cache hits. Recall drift is recall@k of each backend's per-resume top-k
+chunks for a fixed set of recruiter questions, measured against the first
+backend in --backends.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import embeddings
+from bench_e2e import QUESTIONS, ROLE_QUESTION, synthetic_resume
+
+QUERIES = QUESTIONS + [
+    ROLE_QUESTION,
+    "Which companies has the candidate worked at?",
+    "Does the candidate have cloud or DevOps experience?",
+    "What did the candidate build with Spark?",
+    "What is the candidate's education?",
+]
+
+BOILERPLATE = (
+    "References available on request. I hereby declare that the information furnished above is true "
+    "to the best of my knowledge and belief. Willing to relocate. Open to remote and hybrid roles."
+)
+
+
+def make_corpus(resumes: int, boilerplate: float, seed: int) -> List[List[str]]:
+    """Chunks of each synthetic resume, split exactly as ResumeQASystem splits them"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50,
+                                              separators=["\n\n", "\n", " ", ""])
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(resumes):
+        text = synthetic_resume(rng, jobs=rng.randint(2, 6), projects=rng.randint(1, 4))
+        if rng.random() < boilerplate:
+            text += "\n\n" + BOILERPLATE
+        corpus.append(splitter.split_text(text))
+    return corpus
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def encode(model, corpus: List[List[str]], batch_size: int) -> Dict[str, Any]:
+    """Encode every chunk in batches; return per-resume vectors and the elapsed time"""
+    chunks = [chunk for resume in corpus for chunk in resume]
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        vectors.extend(model.embed_documents(chunks[i:i + batch_size]))
+    elapsed = time.perf_counter() - start
+
+    matrix = _normalize(np.asarray(vectors, dtype="float32"))
+    per_resume, offset = [], 0
+    for resume in corpus:
+        per_resume.append(matrix[offset:offset + len(resume)])
+        offset += len(resume)
+    return {"vectors": per_resume, "seconds": elapsed, "chunks": len(chunks)}
+
+
+def top_k(model, per_resume: List[np.ndarray], k: int) -> List[List[set]]:
+    """Indices of the k best chunks of every resume for every query"""
+    queries = _normalize(np.asarray([model.embed_query(query) for query in QUERIES], dtype="float32"))
+    results = []
+    for vectors in per_resume:
+        scores = queries @ vectors.T
+        results.append([set(np.argsort(-row)[:k].tolist()) for row in scores])
+    return results
+
+
+def recall_at_k(baseline: List[List[set]], candidate: List[List[set]]) -> float:
+    overlaps = [len(b & c) / len(b) for b_resume, c_resume in zip(baseline, candidate)
+                for b, c in zip(b_resume, c_resume) if b]
+    return sum(overlaps) / len(overlaps) if overlaps else 1.0
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    embeddings.EMBEDDING_THREADS = args.threads
+    corpus = make_corpus(args.resumes, args.boilerplate, args.seed)
+    results: Dict[str, Any] = {"config": vars(args), "backends": {}}
+    baseline_name: Optional[str] = None
+    baseline_top: Optional[List[List[set]]] = None
+    baseline_vectors: Optional[List[np.ndarray]] = None
+
+    for name in args.backends.split(","):
+        model = embeddings.BACKENDS[name](args.model)
+        model.embed_documents(["warmup"])
+
+        cold = encode(model, corpus, args.batch_size)
+        cached_model = embeddings.CachedEmbeddings(model, max_entries=cold["chunks"] + 1)
+        first_pass = encode(cached_model, corpus, args.batch_size)
+        boilerplate_hits = cached_model.hits
+        second_pass = encode(cached_model, corpus, args.batch_size)
+        ranking = top_k(model, cold["vectors"], args.k)
+
+        result = {
+            "chunks": cold["chunks"],
+            "chunks_per_sec": cold["chunks"] / cold["seconds"] if cold["seconds"] else 0.0,
+            "cached_first_pass_chunks_per_sec":
+                first_pass["chunks"] / first_pass["seconds"] if first_pass["seconds"] else 0.0,
+            "cache_hits_first_pass": boilerplate_hits,
+            "cached_repeat_chunks_per_sec":
+                second_pass["chunks"] / second_pass["seconds"] if second_pass["seconds"] else 0.0,
+        }
+        if baseline_top is None:
+            baseline_name, baseline_top, baseline_vectors = name, ranking, cold["vectors"]
+        else:
+            result[f"recall@{args.k}_vs_{baseline_name}"] = recall_at_k(baseline_top, ranking)
+            if cold["vectors"][0].shape[1] == baseline_vectors[0].shape[1]:
+                cosines = [float(np.mean(np.sum(a * b, axis=1)))
+                           for a, b in zip(baseline_vectors, cold["vectors"])]
+                result[f"mean_cosine_vs_{baseline_name}"] = sum(cosines) / len(cosines)
+        results["backends"][name] = result
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--backends", default="huggingface,onnx,onnx-int8",
+                        help="Comma-separated backends; the first is the recall baseline")
+    parser.add_argument("--model", default=embeddings.EMBEDDING_MODEL)
+    parser.add_argument("--batch-size", type=int, default=embeddings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=embeddings.EMBEDDING_THREADS,
+                        help="Intra-op threads (0 = library default)")
+    parser.add_argument("--boilerplate", type=float, default=0.5,
+                        help="Fraction of resumes ending with the same boilerplate paragraph")
+    parser.add_argument("--k", type=int, default=4, help="Chunks retrieved per question")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'backend':<14}{'chunks/s':>12}{'cached/s':>12}{'recall@k':>10}")
+    for name, result in results["backends"].items():
+        recall = next((v for key, v in result.items() if key.startswith("recall@")), 1.0)
+        print(f"{name:<14}{result['chunks_per_sec']:>12.1f}{result['cached_repeat_chunks_per_sec']:>12.1f}"
+              f"{recall:>10.3f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
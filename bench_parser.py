@@ -0,0 +1,364 @@
+"""Parser equivalence check and benchmark for parse_llm_response.
+
+Usage:
+    python bench_parser.py --samples 2000 --sections-scale 20
+
+Generates synthetic LLM extraction outputs, checks that parse_llm_response
+returns exactly what the original line-scanning parser returned, then reports
+lines/sec for both. The reference parser below is a frozen copy of the
+implementation before the single-pass tokenizer and must not be edited.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from resume_parser import parse_llm_response
+
+
+# ---------------------------------------------------------------------------
+# Frozen reference implementation (golden output)
+# ---------------------------------------------------------------------------
+
+def reference_parse_llm_response(text: str) -> Dict[str, Any]:
+    """Parse the LLM response with improved work experience handling and certificates section"""
+    sections = {
+       "Basic Info": {  # Changed to nested structure for basic info
+            "Name": "",
+            "Email": "",
+            "Phone": ""
+        },
+        "Profile Summary": "",
+        "Work Experience": [],  # Changed to list to store multiple experiences
+        "Education": "",
+        "Technical Skills": "",
+        "Projects": [],
+        "Certificates": ""  # Added certificates section
+    }
+    
+    section_markers = {
+        "name:": ("Basic Info", "Name"),
+        "email:": ("Basic Info", "Email"),
+        "phone:": ("Basic Info", "Phone"),
+        "phone number:": ("Basic Info", "Phone"),
+        "profile summary:": ("Profile Summary", None),
+        "summary:": ("Profile Summary", None),
+        "work experience:": ("Work Experience", None),
+        "employment:": ("Work Experience", None),
+        "education:": ("Education", None),
+        "technical skills:": ("Technical Skills", None),
+        "skills:": ("Technical Skills", None),
+        "projects:": ("Projects", None),
+        "certificates:": ("Certificates", None),
+        "certifications:": ("Certificates", None)
+    }
+    
+    lines = text.split('\n')
+    current_section = None
+    current_subsection = None
+    section_content = []
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        line_lower = line.lower()
+        
+        # Check if this line starts a new section
+        new_section = None
+        new_subsection = None
+        for marker, (section, subsection) in section_markers.items():
+            if line_lower.startswith(marker):
+                new_section = section
+                new_subsection = subsection
+                content = line[len(marker):].strip()
+                break
+        
+        if new_section:
+            # Save content from previous section if it exists
+            if current_section and section_content:
+                if current_section == "Work Experience":
+                    sections[current_section] = reference_parse_work_experience('\n'.join(section_content))
+                elif current_section == "Projects":
+                    sections[current_section] = reference_parse_projects('\n'.join(section_content))
+                elif current_section == "Basic Info" and current_subsection:
+                    sections[current_section][current_subsection] = '\n'.join(section_content).strip()
+                else:
+                    sections[current_section] = '\n'.join(section_content).strip()
+            
+            # Start new section
+            current_section = new_section
+            current_subsection = new_subsection
+            section_content = [content] if content else []
+        elif current_section:
+            # Add line to current section
+            section_content.append(line)
+    
+    # Save the last section's content
+    if current_section and section_content:
+        if current_section == "Work Experience":
+            sections[current_section] = reference_parse_work_experience('\n'.join(section_content))
+        elif current_section == "Projects":
+            sections[current_section] = reference_parse_projects('\n'.join(section_content))
+        elif current_section == "Basic Info" and current_subsection:
+            sections[current_section][current_subsection] = '\n'.join(section_content).strip()
+        else:
+            sections[current_section] = '\n'.join(section_content).strip()
+    
+    return sections
+
+def reference_parse_work_experience(text: str) -> List[Dict[str, Any]]:
+    """Parse work experience with improved company and responsibility detection"""
+    experiences = []
+    current_exp = None
+    current_responsibilities = []
+    
+    lines = text.split('\n')
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            i += 1
+            continue
+        
+        # Check for new company entry (starts with bullet or contains date in parentheses)
+        if (line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and 
+            ('(' in line and ')' in line)) or \
+           (not line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and 
+            '(' in line and ')' in line):
+            
+            # Save previous experience if exists
+            if current_exp and current_responsibilities:
+                current_exp['responsibilities'] = current_responsibilities
+                experiences.append(current_exp)
+            
+            # Clean up the line
+            if line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
+                line = line[1:].strip()
+            
+            # Parse company info
+            try:
+                company_part, date_part = line.split('(', 1)
+                date_part = date_part.rstrip(')')
+                
+                # Split location if present
+                if ',' in date_part:
+                    date_info, location = date_part.rsplit(',', 1)
+                else:
+                    date_info, location = date_part, ""
+                
+                current_exp = {
+                    'company': company_part.strip(),
+                    'duration': date_info.strip(),
+                    'location': location.strip(),
+                    'responsibilities': []
+                }
+                current_responsibilities = []
+            except ValueError:
+                # Handle malformed lines
+                current_exp = {
+                    'company': line,
+                    'duration': '',
+                    'location': '',
+                    'responsibilities': []
+                }
+                current_responsibilities = []
+        
+        # Check for responsibility
+        elif line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')) and current_exp:
+            resp = line.lstrip('•-*○·►▪➢ ').strip()
+            if resp:
+                current_responsibilities.append(resp)
+        
+        i += 1
+    
+    # Add final experience
+    if current_exp and current_responsibilities:
+        current_exp['responsibilities'] = current_responsibilities
+        experiences.append(current_exp)
+    
+    return experiences
+
+def reference_parse_projects(text: str) -> List[Dict[str, Any]]:
+    """Parse projects into structured format"""
+    projects = []
+    current_project = None
+    current_details = []
+    
+    lines = text.split('\n')
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            i += 1
+            continue
+        
+        # Check if line starts with bullet and might be a project title
+        if line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
+            clean_line = line.lstrip('•-*○·►▪➢ ').strip()
+            
+            # If current line doesn't contain "Technologies:" and next lines have bullets,
+            # it's likely a project title
+            is_title = True
+            if i + 1 < len(lines):
+                next_line = lines[i + 1].strip()
+                if next_line.startswith(('•', '-', '*', '○', '·', '►', '▪', '➢')):
+                    if "technologies:" in clean_line.lower() or \
+                       "developed" in clean_line.lower() or \
+                       "implemented" in clean_line.lower() or \
+                       "built" in clean_line.lower():
+                        is_title = False
+            
+            if is_title:
+                # Save previous project if exists
+                if current_project and current_details:
+                    current_project['details'] = current_details
+                    projects.append(current_project)
+                
+                # Start new project
+                current_project = {
+                    'title': clean_line,
+                    'details': []
+                }
+                current_details = []
+            elif current_project:
+                current_details.append(clean_line)
+        
+        i += 1
+    
+    # Add final project
+    if current_project and current_details:
+        current_project['details'] = current_details
+        projects.append(current_project)
+    
+    return projects
+
+
+# ---------------------------------------------------------------------------
+# Synthetic LLM outputs
+# ---------------------------------------------------------------------------
+
+BULLETS = ['•', '-', '*', '○', '·', '►', '▪', '➢']
+HEADERS = {
+    "name": ["Name:", "NAME:", "name:"],
+    "email": ["Email:", "E-mail:", "email:"],
+    "phone": ["Phone:", "Phone Number:", "phone number:"],
+    "summary": ["Profile Summary:", "Summary:", "PROFILE SUMMARY:"],
+    "experience": ["Work Experience:", "Employment:", "Work experience:"],
+    "education": ["Education:"],
+    "skills": ["Technical Skills:", "Skills:", "TECHNICAL SKILLS:"],
+    "projects": ["Projects:", "projects:"],
+    "certificates": ["Certificates:", "Certifications:"],
+}
+WORDS = ("python java kubernetes docker aws sql react developed implemented built data pipeline "
+         "team led designed migrated services latency reduced customers analytics model "
+         "technologies: spark airflow terraform").split()
+
+
+def _sentence(rng: random.Random, length: int = 8) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def synthetic_output(rng: random.Random, scale: int = 1) -> str:
+    """One fake extraction response, including malformed lines and stray whitespace"""
+    lines = []
+    for _ in range(scale):
+        keys = list(HEADERS)
+        rng.shuffle(keys)
+        for key in keys:
+            header = rng.choice(HEADERS[key])
+            if key in ("name", "email", "phone", "education", "skills", "certificates", "summary"):
+                lines.append(f"{header} {_sentence(rng, rng.randint(0, 6))}")
+                for _ in range(rng.randint(0, 3)):
+                    lines.append(("  " if rng.random() < 0.3 else "") + _sentence(rng))
+            elif key == "experience":
+                lines.append(header)
+                for _ in range(rng.randint(0, 4)):
+                    bullet = rng.choice(BULLETS + [""])
+                    location = f", {rng.choice(['Remote', 'NYC', 'Pune'])}" if rng.random() < 0.7 else ""
+                    company = _sentence(rng, 2).title()
+                    if rng.random() < 0.1:
+                        lines.append(f"{bullet} {company} 2019) oops (")
+                    else:
+                        lines.append(f"{bullet} {company} (2019 - 2023{location})")
+                    for _ in range(rng.randint(0, 4)):
+                        lines.append(f"{rng.choice(BULLETS)} {_sentence(rng)}")
+            else:
+                lines.append(header)
+                for _ in range(rng.randint(0, 4)):
+                    lines.append(f"{rng.choice(BULLETS)} {_sentence(rng, 3).title()}")
+                    for _ in range(rng.randint(0, 3)):
+                        lines.append(f"{rng.choice(BULLETS)} {_sentence(rng)}")
+            if rng.random() < 0.3:
+                lines.append("")
+    return "\n".join(lines)
+
+
+def check_equivalence(samples: List[str]) -> int:
+    """Return the number of samples where the two parsers disagree"""
+    mismatches = 0
+    for i, text in enumerate(samples):
+        expected = reference_parse_llm_response(text)
+        actual = parse_llm_response(text)
+        if actual != expected:
+            mismatches += 1
+            if mismatches == 1:
+                print(f"Mismatch on sample {i}:", file=sys.stderr)
+                print(json.dumps({"expected": expected, "actual": actual}, indent=2), file=sys.stderr)
+    return mismatches
+
+
+def benchmark(parser: Callable[[str], Dict[str, Any]], samples: List[str], repeat: int) -> float:
+    """Best-of-repeat lines/sec for parsing every sample once"""
+    line_count = sum(text.count("\n") + 1 for text in samples)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in samples:
+            parser(text)
+        best = min(best, time.perf_counter() - start)
+    return line_count / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--sections-scale", type=int, default=20,
+                        help="Repeat the section layout this many times per sample to make outputs large")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    samples = [synthetic_output(rng, rng.randint(1, args.sections_scale)) for _ in range(args.samples)]
+
+    mismatches = check_equivalence(samples)
+    reference_rate = benchmark(reference_parse_llm_response, samples, args.repeat)
+    current_rate = benchmark(parse_llm_response, samples, args.repeat)
+    results = {
+        "samples": len(samples),
+        "lines": sum(text.count("\n") + 1 for text in samples),
+        "mismatches": mismatches,
+        "reference_lines_per_sec": reference_rate,
+        "current_lines_per_sec": current_rate,
+        "speedup": current_rate / reference_rate,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Equivalence: {len(samples) - mismatches}/{len(samples)} samples identical")
+        print(f"Reference parser: {reference_rate:,.0f} lines/sec")
+        print(f"Current parser:   {current_rate:,.0f} lines/sec ({results['speedup']:.2f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
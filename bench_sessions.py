@@ -0,0 +1,107 @@
+"""Memory benchmark of many concurrent sessions under a SessionStore budget.
+
+Usage:
+    python bench_sessions.py --sessions 300 --budget-mb 64
+    python bench_sessions.py --precisions float32,float16 --embeddings huggingface --output sessions.json
+
+Builds one ResumeQASystem per synthetic resume for each index precision
+and registers them all in a SessionStore. Recruiters then retrieve context
+for random sessions, so idle indexes are evicted to disk and reloaded.
+Reports bytes per session, the resident total against the budget,
+evictions, reloads, retrieval latency and recall@k against the first
+precision in --precisions.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import embeddings
+from bench_e2e import QUESTIONS, synthetic_resume
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    embeddings.set_default_backend(args.embeddings)
+    from qa_system import ResumeQASystem
+    from session_store import SessionStore
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_resume(rng, jobs=rng.randint(2, 6), projects=rng.randint(1, 4))
+              for _ in range(args.sessions)]
+    results: Dict[str, Any] = {"config": vars(args), "precisions": {}}
+    baseline: Optional[List[List[List[str]]]] = None
+
+    for precision in args.precisions.split(","):
+        store = SessionStore(budget_mb=args.budget_mb)
+        for i, text in enumerate(corpus):
+            qa_system = ResumeQASystem(index_precision=precision)
+            qa_system.create_knowledge_base(text)
+            store.put(f"session-{i}", qa_system)
+        stats_after_upload = store.stats()
+
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            with store.use(f"session-{rng.randrange(args.sessions)}") as qa_system:
+                qa_system._retrieve_context(rng.choice(QUESTIONS))
+            latencies.append(time.perf_counter() - start)
+
+        # Top-k chunks of every session for every question, compared with the first precision
+        top_chunks = []
+        for i in range(args.sessions):
+            with store.use(f"session-{i}") as qa_system:
+                top_chunks.append([[doc.page_content for doc in qa_system.db.similarity_search(question, k=args.k)]
+                                   for question in QUESTIONS])
+        resident = [row["bytes"] for row in store.report() if row["resident"]]
+        stats = store.stats()
+        result = {
+            "bytes_per_resident_session": sum(resident) / len(resident) if resident else 0.0,
+            "resident_after_upload": stats_after_upload["resident"],
+            "bytes_total": stats["bytes"],
+            "budget_bytes": stats["budget_bytes"],
+            "evictions": stats["evictions"],
+            "reloads": stats["reloads"],
+            "retrieval_p50_ms": _percentile(latencies, 0.5) * 1000,
+            "retrieval_p95_ms": _percentile(latencies, 0.95) * 1000,
+        }
+        if baseline is None:
+            baseline = top_chunks
+        else:
+            overlaps = [len(set(b) & set(c)) / len(b) for b_session, c_session in zip(baseline, top_chunks)
+                        for b, c in zip(b_session, c_session) if b]
+            result["recall@k_vs_first"] = sum(overlaps) / len(overlaps) if overlaps else 1.0
+        results["precisions"][precision] = result
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--budget-mb", type=float, default=32.0)
+    parser.add_argument("--requests", type=int, default=1000, help="Retrievals against random sessions")
+    parser.add_argument("--precisions", default="float32,float16",
+                        help="Comma-separated index precisions; the first is the recall baseline")
+    parser.add_argument("--embeddings", default="hash", help="Embedding backend (default: hash)")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'precision':<12}{'KB/session':>12}{'total MB':>10}{'evictions':>11}{'reloads':>9}{'p95 ms':>9}")
+    for precision, result in results["precisions"].items():
+        print(f"{precision:<12}{result['bytes_per_resident_session'] / 1e3:>12.1f}{result['bytes_total'] / 1e6:>10.2f}"
+              f"{result['evictions']:>11}{result['reloads']:>9}{result['retrieval_p95_ms']:>9.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
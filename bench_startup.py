@@ -0,0 +1,142 @@
+"""Cold-start profile of the Streamlit app.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --top 30 --embeddings huggingface --output startup.json
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter and reports
+self and cumulative import time per module, the slowest modules and the
+total per top-level package. A second fresh interpreter renders the app once
+with Streamlit's AppTest and reports the time to first render, which heavy
+packages were already loaded by then, and when the background embedding
+warmup finished (the ML stack is ready).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = ("langchain", "langchain_community", "faiss", "torch", "sentence_transformers",
+                 "pandas", "groq", "jsonschema", "PyPDF2")
+
+# Runs in the child interpreter; prints one JSON line with the timings
+RENDER_SCRIPT = """
+import json, sys, threading, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout={timeout!r}).run()
+rendered = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+warmup = [thread for thread in threading.enumerate() if thread.name == "embedding-warmup"]
+for thread in warmup:
+    thread.join({timeout!r})
+ready = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_ms": (imported - start) * 1000,
+    "first_render_ms": (rendered - imported) * 1000,
+    "time_to_first_render_ms": (rendered - start) * 1000,
+    "render_exceptions": [str(e.value) for e in app.exception],
+    "heavy_modules_at_first_render": loaded,
+    "warmup_started": bool(warmup),
+    "ml_ready_ms": (ready - start) * 1000 if warmup else None,
+    "heavy_modules_when_ready": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def _env(embedding_backend: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    if embedding_backend:
+        env["EMBEDDING_BACKEND"] = embedding_backend
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Modules from -X importtime output with self/cumulative ms and nesting depth"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
+
+
+def import_profile(module: str, top: int, embedding_backend: Optional[str]) -> Dict[str, Any]:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=HERE,
+                          env=_env(embedding_backend), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    modules = parse_importtime(proc.stderr)
+    packages: Dict[str, float] = defaultdict(float)
+    for entry in modules:
+        packages[entry["module"].split(".")[0]] += entry["self_ms"]
+    return {
+        "total_ms": sum(entry["cumulative_ms"] for entry in modules if entry["depth"] == 0),
+        "slowest": sorted(modules, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top],
+        "packages": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]),
+        "heavy_modules_loaded": [name for name in HEAVY_MODULES if any(
+            entry["module"] == name or entry["module"].startswith(name + ".") for entry in modules)],
+    }
+
+
+def render_profile(timeout: float, embedding_backend: Optional[str]) -> Dict[str, Any]:
+    script = RENDER_SCRIPT.format(app=os.path.join(HERE, "app.py"), timeout=timeout, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-c", script], cwd=HERE, env=_env(embedding_backend),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Rendering app.py failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module whose import is profiled")
+    parser.add_argument("--top", type=int, default=20, help="Number of modules and packages to list")
+    parser.add_argument("--embeddings", default=None,
+                        help="EMBEDDING_BACKEND for the profiled app (default: the environment's)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for render and warmup")
+    parser.add_argument("--skip-render", action="store_true", help="Only profile imports")
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {"config": vars(args),
+                               "imports": import_profile(args.module, args.top, args.embeddings)}
+    imports = results["imports"]
+    print(f"import {args.module}: {imports['total_ms']:.0f} ms")
+    print(f"{'module':<50}{'self ms':>10}{'cumul. ms':>11}")
+    for entry in imports["slowest"]:
+        print(f"{entry['module'][:49]:<50}{entry['self_ms']:>10.1f}{entry['cumulative_ms']:>11.1f}")
+    print(f"\n{'package':<50}{'self ms':>10}")
+    for package, ms in imports["packages"].items():
+        print(f"{package[:49]:<50}{ms:>10.1f}")
+    print(f"\nheavy modules loaded by import: {', '.join(imports['heavy_modules_loaded']) or 'none'}")
+
+    if not args.skip_render:
+        results["render"] = render = render_profile(args.timeout, args.embeddings)
+        print(f"time to first render: {render['time_to_first_render_ms']:.0f} ms "
+              f"(streamlit import {render['streamlit_import_ms']:.0f} ms, script run {render['first_render_ms']:.0f} ms)")
+        print(f"heavy modules loaded at first render: {', '.join(render['heavy_modules_at_first_render']) or 'none'}")
+        if render["ml_ready_ms"] is not None:
+            print(f"embedding warmup finished at: {render['ml_ready_ms']:.0f} ms")
+        for error in render["render_exceptions"]:
+            print(f"render exception: {error}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
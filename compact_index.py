@@ -0,0 +1,89 @@
+"""Compact FAISS storage for the per-resume and corpus vector indexes.
+
+FAISS is imported by the functions themselves, so that importing this module
+(from qa_system) stays cheap. INDEX_PRECISION selects how chunk vectors are kept:
+    float32  exact flat index (default)
+    float16  scalar-quantized to half precision: half the memory, practically the same ranking
+    pq       product quantization, PQ_SUBQUANTIZERS bytes per vector. Training needs at least
+             PQ_MIN_TRAIN vectors, so smaller indexes (every single resume) use float16 instead.
+"""
+import os
+
+INDEX_PRECISION = os.getenv("INDEX_PRECISION", "float32").lower()
+PQ_SUBQUANTIZERS = int(os.getenv("PQ_SUBQUANTIZERS", "48"))
+# FAISS wants 39 training vectors per centroid, 256 centroids per subquantizer
+PQ_MIN_TRAIN = int(os.getenv("PQ_MIN_TRAIN", "10000"))
+
+PRECISIONS = ("float32", "float16", "pq")
+
+
+def _precision_of(index) -> str:
+    import faiss
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "float16"
+    return "float32"
+
+
+def _inner(index):
+    import faiss
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+
+
+def empty_index(dim: int, metric: int = 1, precision: str = INDEX_PRECISION):
+    """Index that needs no training; pq indexes start as float16 until compact_index converts them.
+
+    metric is a FAISS metric type, faiss.METRIC_L2 (1) by default.
+    """
+    import faiss
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown index precision {precision!r}, expected one of {PRECISIONS}")
+    if precision == "float32":
+        return faiss.IndexFlat(dim, metric)
+    return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, metric)
+
+
+def compact_index(index, precision: str = INDEX_PRECISION):
+    """Copy of index stored at precision, or index itself if it is already that compact.
+
+    Works on flat and float16 indexes, optionally wrapped in an IndexIDMap2.
+    Product-quantized indexes are never expanded again.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown index precision {precision!r}, expected one of {PRECISIONS}")
+    import faiss
+    inner = _inner(index)
+    current = _precision_of(inner)
+    if precision == "pq" and (inner.ntotal < PQ_MIN_TRAIN or inner.d % PQ_SUBQUANTIZERS):
+        precision = "float16"
+    if current == precision or current == "pq" or precision == "float32":
+        return index
+
+    vectors = inner.reconstruct_n(0, inner.ntotal)
+    if precision == "pq":
+        compact = faiss.IndexPQ(inner.d, PQ_SUBQUANTIZERS, 8, inner.metric_type)
+        compact.train(vectors)
+    else:
+        compact = empty_index(inner.d, inner.metric_type, precision)
+    if isinstance(index, faiss.IndexIDMap2):
+        compact = faiss.IndexIDMap2(compact)
+        compact.add_with_ids(vectors, faiss.vector_to_array(index.id_map))
+    else:
+        compact.add(vectors)
+    return compact
+
+
+def index_bytes(index) -> int:
+    """Approximate memory held by the vectors (and id map) of an index"""
+    if index is None:
+        return 0
+    import faiss
+    inner = _inner(index)
+    size = inner.ntotal * getattr(inner, "code_size", inner.d * 4)
+    if isinstance(inner, faiss.IndexPQ):
+        size += inner.pq.centroids.size() * 4
+    if inner is not index:
+        # id_map plus the reverse map of IndexIDMap2
+        size += index.ntotal * 24
+    return size
@@ -0,0 +1,277 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import faiss
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from compact_index import INDEX_PRECISION, compact_index, empty_index, index_bytes
+from embeddings import EMBEDDING_MODEL, embedding_version, get_embeddings
+
+VECTORS_FILE = "vectors.faiss"
+METADATA_FILE = "metadata.sqlite3"
+
+
+def section_texts(extracted_data: Dict[str, Any]) -> Dict[str, str]:
+    """Flatten parse_llm_response output into one text block per section"""
+    texts = {}
+    for section, content in extracted_data.items():
+        if not content:
+            continue
+        if section == "Basic Info":
+            text = "\n".join(f"{field}: {value}" for field, value in content.items() if value)
+        elif section == "Work Experience":
+            text = "\n\n".join(
+                "\n".join([f"{exp['company']} ({exp['duration']}, {exp['location']})"] +
+                          [f"• {resp}" for resp in exp['responsibilities']])
+                for exp in content
+            )
+        elif section == "Projects":
+            text = "\n\n".join(
+                "\n".join([project['title']] + [f"• {detail}" for detail in project['details']])
+                for project in content
+            )
+        else:
+            text = str(content)
+        if text.strip():
+            texts[section] = text
+    return texts
+
+
+class CorpusIndex:
+    """Persistent vector index over the chunks of many resumes.
+
+    Normalized chunk embeddings are stored in a FAISS IndexIDMap2 over an
+    inner-product index, so scores are cosine similarities. With precision
+    float16 or pq (see compact_index) the vectors are stored compactly; pq is
+    trained on save once the corpus is large enough. Chunk ids are the rows of
+    a SQLite table holding the resume id, section, upload date and text of
+    each chunk, which is what filtered search selects on. Changes to both are
+    only written by save(), so a resume is replaced as a whole or not at all.
+    """
+
+    def __init__(self, directory: str, model_name: str = EMBEDDING_MODEL, mmap: bool = False,
+                 precision: str = INDEX_PRECISION):
+        self.directory = directory
+        self.model_name = model_name
+        self.precision = precision
+        self.read_only = mmap
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50,
+            separators=["\n\n", "\n", " ", ""]
+        )
+        self._lock = threading.RLock()
+        # Rows whose vectors were already removed from the index; deleted from SQLite by save()
+        self._deleted_ids: Set[int] = set()
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(directory, METADATA_FILE), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   resume_id TEXT NOT NULL,
+                   section TEXT NOT NULL,
+                   upload_date TEXT NOT NULL,
+                   text TEXT NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_resume ON chunks(resume_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_section ON chunks(section)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Stored vectors only compare with queries encoded by the same embeddings
+        version = embedding_version(model_name)
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'embeddings'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO settings (key, value) VALUES ('embeddings', ?)", (version,))
+        elif row[0] != version:
+            raise ValueError(f"Corpus in {directory} was built with {row[0]} embeddings, not {version}; "
+                             "use the same EMBEDDING_BACKEND and EMBEDDING_MODEL or a new directory")
+        self._conn.commit()
+
+        self.index = None
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        if os.path.exists(vectors_path):
+            flags = 0
+            if mmap:
+                # Newer FAISS versions can map flat codes directly; older ones fall back to IO_FLAG_MMAP
+                flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            self.index = faiss.read_index(vectors_path, flags)
+        self._reconcile()
+
+    def _reconcile(self):
+        """Drop chunk rows whose vectors were never saved and vectors whose rows were deleted,
+        e.g. after a save() that was interrupted"""
+        saved = set() if self.index is None else set(faiss.vector_to_array(self.index.id_map).tolist())
+        rows = {row[0] for row in self._conn.execute("SELECT id FROM chunks")}
+        orphans = [(chunk_id,) for chunk_id in rows - saved]
+        if orphans:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", orphans)
+            self._conn.commit()
+        # Search skips vectors without a row, so a read-only index can keep them
+        stale = saved - rows
+        if stale and not self.read_only:
+            self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(sorted(stale), dtype="int64")))
+
+    @property
+    def embeddings(self):
+        return get_embeddings(self.model_name)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Corpus index was opened memory-mapped and is read-only")
+
+    def add_resume(self, resume_id: str, extracted_data: Dict[str, Any],
+                   upload_date: Optional[str] = None) -> int:
+        """Chunk and index every section of a parsed resume, replacing any earlier version"""
+        self._check_writable()
+        upload_date = upload_date or datetime.date.today().isoformat()
+        rows = []
+        for section, text in section_texts(extracted_data).items():
+            for chunk in self.text_splitter.split_text(text):
+                rows.append((resume_id, section, upload_date, chunk))
+        if not rows:
+            return 0
+
+        vectors = self._encode([row[3] for row in rows])
+        with self._lock:
+            self.delete_resume(resume_id)
+            ids = []
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (resume_id, section, upload_date, text) VALUES (?, ?, ?, ?)", row
+                )
+                ids.append(cursor.lastrowid)
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(
+                    empty_index(vectors.shape[1], faiss.METRIC_INNER_PRODUCT, self.precision)
+                )
+            self.index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+        return len(rows)
+
+    def delete_resume(self, resume_id: str) -> int:
+        """Remove all chunks of a resume without re-encoding the rest of the corpus"""
+        self._check_writable()
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM chunks WHERE resume_id = ?", (resume_id,)
+            ) if row[0] not in self._deleted_ids]
+            if not ids:
+                return 0
+            if self.index is not None:
+                self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype="int64")))
+            self._deleted_ids.update(ids)
+        return len(ids)
+
+    def save(self):
+        """Commit the new chunk rows, write the vectors, then delete the rows of removed chunks.
+
+        New rows have no saved vectors until the vectors file is replaced, and
+        removed rows are only deleted after it, so whenever save() stops,
+        _reconcile brings every resume back to its old or its new version.
+        """
+        self._check_writable()
+        with self._lock:
+            self._conn.commit()
+            if self.index is not None:
+                self.index = compact_index(self.index, self.precision)
+                tmp_path = os.path.join(self.directory, VECTORS_FILE + ".tmp")
+                faiss.write_index(self.index, tmp_path)
+                os.replace(tmp_path, os.path.join(self.directory, VECTORS_FILE))
+            if self._deleted_ids:
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in self._deleted_ids])
+                self._conn.commit()
+                self._deleted_ids.clear()
+
+    def _filtered_ids(self, resume_ids: Optional[Iterable[str]], sections: Optional[Iterable[str]],
+                      uploaded_after: Optional[str], uploaded_before: Optional[str]) -> Optional[np.ndarray]:
+        clauses, params = [], []
+        if resume_ids is not None:
+            resume_ids = list(resume_ids)
+            clauses.append(f"resume_id IN ({','.join('?' * len(resume_ids))})")
+            params.extend(resume_ids)
+        if sections is not None:
+            sections = list(sections)
+            clauses.append(f"section IN ({','.join('?' * len(sections))})")
+            params.extend(sections)
+        if uploaded_after:
+            clauses.append("upload_date >= ?")
+            params.append(uploaded_after)
+        if uploaded_before:
+            clauses.append("upload_date <= ?")
+            params.append(uploaded_before)
+        if not clauses:
+            return None
+        rows = self._conn.execute(f"SELECT id FROM chunks WHERE {' AND '.join(clauses)}", params)
+        return np.asarray([row[0] for row in rows], dtype="int64")
+
+    def search(self, query: str, k: int = 10, resume_ids: Optional[Iterable[str]] = None,
+               sections: Optional[Iterable[str]] = None, uploaded_after: Optional[str] = None,
+               uploaded_before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k chunks for query, optionally restricted by resume, section and upload date"""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        query_vector = self._encode([query])
+
+        with self._lock:
+            allowed = self._filtered_ids(resume_ids, sections, uploaded_after, uploaded_before)
+            if allowed is not None and len(allowed) == 0:
+                return []
+            params = None
+            if allowed is not None:
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+            scores, ids = self.index.search(query_vector, k, params=params)
+
+            hits = [(int(chunk_id), float(score)) for chunk_id, score in zip(ids[0], scores[0]) if chunk_id != -1]
+            if not hits:
+                return []
+            rows = self._conn.execute(
+                f"SELECT id, resume_id, section, upload_date, text FROM chunks "
+                f"WHERE id IN ({','.join('?' * len(hits))})",
+                [chunk_id for chunk_id, _ in hits]
+            )
+            metadata = {row[0]: row[1:] for row in rows}
+
+        results = []
+        for chunk_id, score in hits:
+            if chunk_id not in metadata:
+                continue
+            resume_id, section, upload_date, text = metadata[chunk_id]
+            results.append({
+                "resume_id": resume_id,
+                "section": section,
+                "upload_date": upload_date,
+                "text": text,
+                "score": score,
+            })
+        return results
+
+    def search_resumes(self, query: str, k: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        """Best matching chunk per resume, for questions like "who mentions Kubernetes in work experience?"."""
+        # Over-fetch chunks so that k distinct resumes survive de-duplication
+        best: Dict[str, Dict[str, Any]] = {}
+        for hit in self.search(query, k=k * 5, **filters):
+            if hit["resume_id"] not in best:
+                best[hit["resume_id"]] = hit
+            if len(best) == k:
+                break
+        return list(best.values())
+
+    def resume_ids(self) -> List[str]:
+        with self._lock:
+            if not self._deleted_ids:
+                return [row[0] for row in self._conn.execute("SELECT DISTINCT resume_id FROM chunks")]
+            return list(dict.fromkeys(resume_id for chunk_id, resume_id in self._conn.execute(
+                "SELECT id, resume_id FROM chunks") if chunk_id not in self._deleted_ids))
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the vectors; metadata stays in SQLite"""
+        with self._lock:
+            return index_bytes(self.index)
@@ -0,0 +1,259 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# "huggingface" (default, PyTorch), "onnx" (ONNX Runtime), "onnx-int8" (ONNX Runtime with an
+# int8-quantized model) or "hash", a deterministic model-free backend for benchmarks and offline runs
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Intra-op CPU threads for PyTorch / ONNX Runtime; 0 keeps the library default
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Quantized ONNX file inside the model repository; pick the one matching the CPU
+# (onnx/model_qint8_avx512_vnni.onnx, onnx/model_quint8_avx2.onnx, onnx/model_qint8_arm64.onnx)
+ONNX_INT8_FILE = os.getenv("ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+# Chunk embeddings kept by text hash so repeated chunks are encoded once; 0 disables the cache.
+# Rows are float32, about 1.6 KB each for a 384-dim model, so the default holds about 16 MB.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+# Set EMBEDDING_WARMUP=0 to load the model on first use instead of at server start
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1").lower() not in ("0", "false", "no")
+
+HASH_EMBEDDING_DIM = int(os.getenv("HASH_EMBEDDING_DIM", "256"))
+
+_models: Dict[Tuple[str, str], object] = {}
+_lock = threading.Lock()
+
+
+def _load_huggingface(model_name: str):
+    from langchain.embeddings import HuggingFaceEmbeddings
+    if EMBEDDING_THREADS:
+        import torch
+        torch.set_num_threads(EMBEDDING_THREADS)
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE})
+
+
+def _onnx_model_kwargs(file_name: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError("The onnx embedding backends need onnxruntime and optimum: "
+                          "pip install onnxruntime optimum") from e
+    session_options = onnxruntime.SessionOptions()
+    if EMBEDDING_THREADS:
+        session_options.intra_op_num_threads = EMBEDDING_THREADS
+    kwargs: Dict[str, Any] = {"provider": "CPUExecutionProvider", "session_options": session_options}
+    if file_name:
+        kwargs["file_name"] = file_name
+    return kwargs
+
+
+def _load_onnx(model_name: str):
+    return SentenceTransformerEmbeddings(model_name, backend="onnx", model_kwargs=_onnx_model_kwargs())
+
+
+def _load_onnx_int8(model_name: str):
+    return SentenceTransformerEmbeddings(model_name, backend="onnx",
+                                         model_kwargs=_onnx_model_kwargs(ONNX_INT8_FILE))
+
+
+def _load_hash(model_name: str):
+    return HashEmbeddings(HASH_EMBEDDING_DIM)
+
+
+BACKENDS: Dict[str, Callable[[str], object]] = {
+    "huggingface": _load_huggingface,
+    "onnx": _load_onnx,
+    "onnx-int8": _load_onnx_int8,
+    "hash": _load_hash,
+}
+
+
+def set_default_backend(backend: str):
+    """Change the backend used when get_embeddings is called without one"""
+    global EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    EMBEDDING_BACKEND = backend
+
+
+def get_embeddings(model_name: str = EMBEDDING_MODEL, backend: Optional[str] = None):
+    """Return the process-wide embedding model, loading it on first use.
+
+    The model is only used for inference, so one instance can be shared by
+    every session and thread. Unless EMBEDDING_CACHE_SIZE is 0 it is wrapped
+    in a CachedEmbeddings keyed by chunk text.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    key = (backend, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {sorted(BACKENDS)}")
+                model = BACKENDS[backend](model_name)
+                if EMBEDDING_CACHE_SIZE > 0:
+                    model = CachedEmbeddings(model, EMBEDDING_CACHE_SIZE)
+                _models[key] = model
+    return model
+
+
+def embedding_version(model_name: str = EMBEDDING_MODEL, backend: Optional[str] = None) -> str:
+    """Backend and model that produce the vectors; part of the key of everything that stores an index"""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "hash":
+        return f"hash-{HASH_EMBEDDING_DIM}"
+    return f"{backend}-{model_name}"
+
+
+def embedding_cache_stats() -> Dict[str, int]:
+    """Combined CachedEmbeddings statistics of the models loaded so far (never loads a model)"""
+    totals = {"hits": 0, "misses": 0, "entries": 0, "bytes": 0}
+    for model in list(_models.values()):
+        if isinstance(model, CachedEmbeddings):
+            for name, value in model.stats().items():
+                totals[name] += value
+    return totals
+
+
+def warmup(model_name: str = EMBEDDING_MODEL, background: bool = True) -> Optional[threading.Thread]:
+    """Load the model and run one encode so the first upload does not pay for it"""
+    def load():
+        get_embeddings(model_name).embed_query("warmup")
+
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+try:
+    from langchain_core.embeddings import Embeddings as _EmbeddingsBase
+except ImportError:
+    _EmbeddingsBase = object
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashEmbeddings(_EmbeddingsBase):
+    """Deterministic bag-of-words embeddings using signed feature hashing.
+
+    Needs no model download and gives identical vectors on every machine,
+    which makes benchmark timings and retrieval results reproducible.
+    """
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if value >> 63 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class SentenceTransformerEmbeddings(_EmbeddingsBase):
+    """sentence-transformers model on any of its inference backends (torch, onnx, openvino)"""
+
+    def __init__(self, model_name: str, backend: str = "torch", batch_size: int = EMBEDDING_BATCH_SIZE,
+                 model_kwargs: Optional[Dict[str, Any]] = None):
+        from sentence_transformers import SentenceTransformer
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, backend=backend, model_kwargs=model_kwargs)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(_EmbeddingsBase):
+    """LRU cache of embeddings in front of another model, keyed by a hash of the text.
+
+    Only texts not already cached are sent to the wrapped model, in one
+    batch, so boilerplate chunks repeated across resumes are encoded once.
+    Vectors are kept as float32 arrays rather than lists of Python floats,
+    which take about eight times the memory.
+    """
+
+    def __init__(self, model, max_entries: int = EMBEDDING_CACHE_SIZE):
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    vectors[key] = vector
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            encoded = np.asarray(self.model.embed_documents(list(missing.values())), dtype="float32")
+            vectors.update(zip(missing, encoded))
+            with self._lock:
+                for key, vector in zip(missing, encoded):
+                    previous = self._vectors.pop(key, None)
+                    if previous is not None:
+                        self._bytes -= previous.nbytes
+                    # A copy, so the cache does not keep the whole batch array alive
+                    self._vectors[key] = vector = vector.copy()
+                    self._bytes += vector.nbytes
+                while len(self._vectors) > self.max_entries:
+                    self._bytes -= self._vectors.popitem(last=False)[1].nbytes
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries are rarely repeated verbatim and may be embedded differently from documents
+        return self.model.embed_query(text)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._vectors),
+                    "bytes": self.memory_bytes()}
+
+    def memory_bytes(self) -> int:
+        """Approximate memory of the cached vectors and their keys"""
+        # Keys are 16-byte digests; about 100 more bytes per entry go to the bytes and array objects
+        return self._bytes + len(self._vectors) * 216
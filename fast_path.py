@@ -0,0 +1,186 @@
+"""Deterministic answers to simple factual questions about a resume.
+
+QuestionRouter recognises three intents: contact fields ("What is their
+email?"), section listings ("What certifications do they have?") and skill
+presence ("Does the candidate know Python?"). These are answered from the
+extracted resume data, the stored skill set and whole-word hits in the
+Technical Skills section. A keyword anywhere else in the resume is not
+enough ("Led go to market strategy" says nothing about Go), and short or
+ambiguous skill names must be in the stored skill set. The router only
+answers when nothing in the question is left unexplained, and it only gives
+positive skill answers. Anything else returns None and goes to the LLM.
+"""
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from lexical_index import LexicalIndex
+from skills import normalize_skill
+
+FAST_PATH_DISABLED = os.getenv("FAST_PATH_DISABLED", "").lower() in ("1", "true", "yes")
+
+# Words that can appear in a simple question without changing what is asked
+_FILLER = frozenset("""
+a all an any are can candidate candidates applicant do does did done completed earned get give
+has have he held her his hold i in is list listed me mention mentioned of obtained on please person
+provide resume show she the their them they this tell what which at with
+""".split())
+
+_CONTACT_FIELDS = [
+    ("Email", re.compile(r"\b(e-?mail(?: address| id)?|mail id)\b")),
+    ("Phone", re.compile(r"\b(phone(?: number)?|mobile(?: number)?|contact number|cell(?: number)?)\b")),
+    ("Name", re.compile(r"\b(full name|name)\b")),
+]
+_CONTACT_ALL = re.compile(r"\b(contact (?:details|info|information)|contact)\b")
+
+_SECTIONS = [
+    ("Certificates", re.compile(r"\b(certificates?|certifications?|certified)\b")),
+    ("Projects", re.compile(r"\b(projects?)\b")),
+    ("Education", re.compile(r"\b(education|educational background|degrees?)\b")),
+    ("Technical Skills", re.compile(r"\b((?:technical )?skills?(?: set)?|skillset)\b")),
+    ("Work Experience", re.compile(r"\b(companies|employers|work experience|work history|worked)\b")),
+]
+
+_SKILL_QUESTION = re.compile(
+    r"^(?:does|do|has|have|is|are|can)\s+(?:the\s+|this\s+)?(?:candidate|applicant|person|he|she|they)\s+"
+    r"(?:know|knows|use|used|possess|"
+    r"(?:have|has)\s+(?:any\s+)?(?:experience|skills?|knowledge|expertise|exposure|background)\s+(?:with|in|of|using)|"
+    r"(?:have\s+|has\s+)?(?:worked|work)\s+(?:with|on|in)|"
+    r"(?:familiar|experienced|skilled|proficient)\s+(?:with|in))\s+"
+    r"(?P<skills>[^?]+?)\s*\??$"
+)
+_SKILL_SEPARATORS = re.compile(r"\s*(?:,|/|&|\band\b|\bor\b)\s*")
+_WORD = re.compile(r"[a-z0-9+#.']+")
+MAX_SKILL_WORDS = 4
+MAX_EVIDENCE_CHARS = 200
+# Skills this short, or that are also common words, are only trusted from the stored skill set
+MIN_SKILL_CHARS = 3
+_AMBIGUOUS_SKILLS = frozenset("""
+go spring rest swift express excel access shell chef puppet salt ant dart julia unity ember meteor
+""".split())
+
+
+def _leftover_words(question: str, matched: Iterable[str]) -> List[str]:
+    """Words of the question not covered by the matched phrases or filler"""
+    for phrase in matched:
+        question = question.replace(phrase, " ")
+    leftover = []
+    for word in _WORD.findall(question):
+        word = word.strip(".'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        if word and word not in _FILLER:
+            leftover.append(word)
+    return leftover
+
+
+def _bullets(text: str) -> List[str]:
+    return [f"• {line.strip().lstrip('•-*○·►▪➢ ').strip()}" for line in text.split("\n") if line.strip()]
+
+
+def _format_section(section: str, content: Any) -> Optional[str]:
+    if not content:
+        return None
+    if section == "Work Experience":
+        lines = [f"• {exp['company']} ({', '.join(part for part in (exp['duration'], exp['location']) if part)})"
+                 for exp in content]
+    elif section == "Projects":
+        lines = []
+        for project in content:
+            lines.append(f"• {project['title']}")
+            lines.extend(f"  - {detail}" for detail in project["details"])
+    else:
+        lines = _bullets(str(content))
+    return "\n".join(lines) if lines else None
+
+
+class QuestionRouter:
+    """Answers contact, section-listing and skill-presence questions without an LLM call"""
+
+    def __init__(self, enabled: bool = not FAST_PATH_DISABLED):
+        self.enabled = enabled
+        self.hits: Dict[str, int] = {"contact": 0, "section": 0, "skill": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def answer(self, question: str, extracted_data: Optional[Dict[str, Any]] = None,
+               skills: Optional[Iterable[str]] = None) -> Optional[str]:
+        """A deterministic answer, or None when the question needs the LLM"""
+        if not self.enabled:
+            return None
+        normalized = " ".join(question.lower().replace("’", "'").split())
+        for intent, handler in (("skill", self._skill_answer), ("contact", self._contact_answer),
+                                ("section", self._section_answer)):
+            answer = handler(normalized, extracted_data or {}, skills)
+            if answer is not None:
+                with self._lock:
+                    self.hits[intent] += 1
+                return answer
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _contact_answer(self, question: str, data: Dict[str, Any], skills) -> Optional[str]:
+        basic = data.get("Basic Info") or {}
+        if _CONTACT_ALL.search(question):
+            fields = ["Email", "Phone"]
+            matched = [m.group(0) for m in _CONTACT_ALL.finditer(question)]
+        else:
+            fields, matched = [], []
+            for field, pattern in _CONTACT_FIELDS:
+                phrases = [match.group(0) for match in pattern.finditer(question)]
+                if phrases:
+                    fields.append(field)
+                    matched.extend(phrases)
+        if not fields or _leftover_words(question, matched):
+            return None
+        if not all(basic.get(field) for field in fields):
+            return None
+        return "\n".join(f"• {field}: {basic[field]}" for field in fields)
+
+    def _section_answer(self, question: str, data: Dict[str, Any], skills) -> Optional[str]:
+        found = [(section, match.group(0)) for section, pattern in _SECTIONS
+                 for match in pattern.finditer(question)]
+        if len({section for section, _ in found}) != 1 or _leftover_words(question, [phrase for _, phrase in found]):
+            return None
+        section = found[0][0]
+        return _format_section(section, data.get(section))
+
+    def _skill_answer(self, question: str, data: Dict[str, Any], skills) -> Optional[str]:
+        match = _SKILL_QUESTION.match(question)
+        if not match:
+            return None
+        requested = [part for part in _SKILL_SEPARATORS.split(match.group("skills")) if part]
+        if not requested or any(len(part.split()) > MAX_SKILL_WORDS for part in requested):
+            return None
+        skill_set = set(skills or ())
+        skills_section = LexicalIndex([str(data.get("Technical Skills") or "")])
+        lines = []
+        for part in requested:
+            skill = normalize_skill(part)
+            evidence = None
+            if len(skill) >= MIN_SKILL_CHARS and skill not in _AMBIGUOUS_SKILLS:
+                evidence = skills_section.find(part) or (skills_section.find(skill) if skill != part else None)
+            if skill in skill_set:
+                lines.append(f"• Yes, {part} is listed among the candidate's skills")
+            elif evidence:
+                lines.append(f"• Yes, {part} is in the Technical Skills section: \"{evidence[:MAX_EVIDENCE_CHARS]}\"")
+            else:
+                # Absence of a keyword is not proof; related experience may be described differently
+                return None
+        return "\n".join(lines)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                **{f"{intent}_hits": count for intent, count in self.hits.items()},
+            }
+
+
+router = QuestionRouter()
@@ -0,0 +1,95 @@
+"""BM25 keyword index over the chunks of one resume.
+
+Built next to the FAISS index in ResumeQASystem. It serves exact keyword
+lookups for the fast path and the lexical half of hybrid retrieval, where
+its ranking is merged with the vector ranking by reciprocal rank fusion.
+"""
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Keeps tokens such as c++, c#, node.js and asp.net whole
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by did do does for from has have he her his how i in is it its of on or
+she that the their them they this to was were what which who with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """Inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, chunks: Iterable[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks: List[str] = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: List[int] = []
+        for i, chunk in enumerate(self.chunks):
+            tokens = tokenize(chunk)
+            self.lengths.append(len(tokens))
+            for token in tokens:
+                postings = self.postings[token]
+                postings[i] = postings.get(i, 0) + 1
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 1.0
+
+    def _idf(self, term: str) -> float:
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.chunks) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """(chunk number, BM25 score) of the k best matching chunks"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for i, tf in postings.items():
+                length_norm = 1 - self.b + self.b * self.lengths[i] / self.avg_length
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def memory_bytes(self) -> int:
+        """Rough size of the postings and lengths; the chunk texts belong to the vector store"""
+        # A postings entry costs about 100 bytes in a dict of small ints
+        return sum(len(term) + 100 * len(postings) for term, postings in self.postings.items()) + 8 * len(self.lengths)
+
+    def find(self, phrase: str) -> Optional[str]:
+        """The first line that contains phrase as whole words, or None"""
+        tokens = _TOKEN.findall(phrase.lower())
+        if not tokens:
+            return None
+        candidates = None
+        for token in tokens:
+            # Stopwords are not indexed, so only the other tokens narrow the candidates
+            if token in STOPWORDS:
+                continue
+            chunk_ids = set(self.postings.get(token, ()))
+            candidates = chunk_ids if candidates is None else candidates & chunk_ids
+        if candidates is None:
+            candidates = set(range(len(self.chunks)))
+        pattern = re.compile(r"(?<![a-z0-9])" + r"\W+".join(re.escape(token) for token in tokens) +
+                             r"(?![a-z0-9+#])")
+        for i in sorted(candidates):
+            for line in self.chunks[i].split("\n"):
+                if pattern.search(line.lower()):
+                    return line.strip()
+        return None
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Merge several rankings of the same items; items ranked high in any list come first"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] += 1 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
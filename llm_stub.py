@@ -0,0 +1,162 @@
+"""Offline stand-in for the Groq chat completions API.
+
+StubGroqClient and AsyncStubGroqClient mimic the parts of groq.Client and
+groq.AsyncClient that utils.py uses, including streaming and usage counts.
+Responses are replayed from a recordings file (prompt hash -> response) when
+available, and otherwise produced by simple rules that understand the
+prompts built in this repo. Latency is simulated as a fixed delay plus
+completion tokens divided by a token rate.
+
+Install with utils.use_clients(stub, lambda: AsyncStubGroqClient(stub)).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from rate_limit import estimate_tokens
+
+STUB_SKILLS = [
+    "python", "java", "sql", "aws", "docker", "kubernetes", "react", "javascript",
+    "machine learning", "spark", "airflow", "terraform", "pandas", "tensorflow", "go",
+]
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def load_recordings(path: str) -> Dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _skills_in(text: str) -> List[str]:
+    lower = text.lower()
+    return [skill for skill in STUB_SKILLS if re.search(rf"\b{re.escape(skill)}\b", lower)]
+
+
+def rule_based_response(prompt: str, answer_words: int = 60) -> str:
+    """Deterministic response for the prompt types used by this app"""
+    if "into a single JSON object" in prompt:
+        # Synthetic resumes are written in the free-text format, so parse them the same way
+        from resume_parser import parse_llm_response
+        text = prompt.split("Resume Text:", 1)[-1].strip()
+        return json.dumps({**parse_llm_response(text), "Skills": _skills_in(text)})
+    if "Please analyze the following resume" in prompt:
+        # Synthetic resumes are already written in the extraction format
+        return prompt.split("Resume Text:", 1)[-1].strip()
+    if prompt.startswith("Extract the required skills"):
+        return ", ".join(_skills_in(prompt.split("Question:", 1)[-1].split("Job Description:", 1)[-1]))
+    if prompt.startswith("Extract only the technical and professional skills"):
+        return ", ".join(_skills_in(prompt.split("Text:", 1)[-1]))
+    words = re.findall(r"\w+", prompt)[-answer_words:]
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return "\n".join(f"• {line}" for line in lines)
+
+
+class StubGroqClient:
+    """Synchronous stub with the shape of groq.Client"""
+
+    def __init__(self, recordings: Optional[Dict[str, str]] = None, latency: float = 0.2,
+                 tokens_per_second: float = 500.0, answer_words: int = 60):
+        self.recordings = recordings or {}
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_words = answer_words
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def respond(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        recorded = self.recordings.get(prompt_hash(prompt))
+        if recorded is not None:
+            return recorded
+        return rule_based_response(prompt, self.answer_words)
+
+    def _usage(self, prompt: str, content: str) -> SimpleNamespace:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                               total_tokens=prompt_tokens + completion_tokens)
+
+    def _generation_time(self, content: str) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return estimate_tokens(content) / self.tokens_per_second
+
+    def _response(self, prompt: str, content: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=self._usage(prompt, content),
+        )
+
+    def _pieces(self, content: str) -> List[str]:
+        # Roughly one piece per token
+        return [content[i:i + 4] for i in range(0, len(content), 4)]
+
+    def create(self, messages: List[Dict[str, str]], stream: bool = False, **kwargs: Any):
+        prompt = messages[-1]["content"]
+        content = self.respond(prompt)
+        if stream:
+            return self._stream(content)
+        time.sleep(self.latency + self._generation_time(content))
+        return self._response(prompt, content)
+
+    def _stream(self, content: str) -> Iterator[SimpleNamespace]:
+        time.sleep(self.latency)
+        pieces = self._pieces(content)
+        delay = self._generation_time(content) / max(len(pieces), 1)
+        for piece in pieces:
+            time.sleep(delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+class AsyncStubGroqClient:
+    """Asynchronous stub with the shape of groq.AsyncClient, sharing a StubGroqClient"""
+
+    def __init__(self, stub: StubGroqClient):
+        self.stub = stub
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: List[Dict[str, str]], **kwargs: Any):
+        prompt = messages[-1]["content"]
+        content = self.stub.respond(prompt)
+        await asyncio.sleep(self.stub.latency + self.stub._generation_time(content))
+        return self.stub._response(prompt, content)
+
+    async def close(self):
+        pass
+
+
+class RecordingClient:
+    """Wraps a real groq.Client and saves every non-streamed response for later replay"""
+
+    def __init__(self, client: Any, path: str):
+        self.client = client
+        self.path = path
+        self.recordings = load_recordings(path)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages: List[Dict[str, str]], **kwargs: Any):
+        response = self.client.chat.completions.create(messages=messages, **kwargs)
+        if not kwargs.get("stream"):
+            with self._lock:
+                self.recordings[prompt_hash(messages[-1]["content"])] = \
+                    response.choices[0].message.content.strip()
+        return response
+
+    def save(self):
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.recordings, f, indent=1)
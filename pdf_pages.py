@@ -0,0 +1,121 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGE_CACHE_SIZE = int(os.getenv("PDF_PAGE_CACHE_SIZE", "4096"))
+
+# Below this many uncached pages, starting worker processes costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
+
+class PDFLimitError(ValueError):
+    """Raised when a PDF is larger than MAX_PDF_BYTES"""
+
+
+class PageTextCache:
+    """Thread-safe in-memory LRU of extracted page text keyed by file hash and page number"""
+
+    def __init__(self, max_entries: int = PAGE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def set(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+page_cache = PageTextCache()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pool
+
+
+def _extract_pages(data: bytes, indices: List[int]) -> List[str]:
+    """Extract the text of the given pages. Runs inside the process pool."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in indices]
+
+
+def iter_pdf_pages(data: bytes, workers: int = PDF_WORKERS, max_pages: int = MAX_PDF_PAGES,
+                   max_bytes: int = MAX_PDF_BYTES) -> Iterator[str]:
+    """Yield the text of each page in order as soon as it is available.
+
+    Pages beyond max_pages are ignored. Each page is extracted at most once and
+    its text cached by the hash of the whole file and the page number, so
+    repeated uploads are free. The page content alone is not a safe key: the
+    text also depends on form XObjects and font encodings it refers to, and
+    the cache is shared by every session. With workers > 1, uncached pages are
+    split into contiguous batches and extracted in a process pool.
+    """
+    if len(data) > max_bytes:
+        raise PDFLimitError(f"PDF is {len(data)} bytes, above the limit of {max_bytes}")
+
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = min(len(reader.pages), max_pages)
+    file_hash = hashlib.sha256(data).hexdigest()
+    keys = [f"{file_hash}:{i}" for i in range(page_count)]
+    cached = [page_cache.get(key) for key in keys]
+    missing = [i for i, text in enumerate(cached) if text is None]
+
+    if workers <= 1 or len(missing) < PARALLEL_MIN_PAGES:
+        for i in range(page_count):
+            if cached[i] is None:
+                cached[i] = reader.pages[i].extract_text() or ""
+                page_cache.set(keys[i], cached[i])
+            yield cached[i]
+        return
+
+    # Two batches per worker keeps every worker busy while letting early pages finish first
+    batch_size = max(1, -(-len(missing) // (workers * 2)))
+    pool = _get_pool()
+    futures: List[Tuple[List[int], object]] = []
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        futures.append((batch, pool.submit(_extract_pages, data, batch)))
+
+    pending = iter(futures)
+    for i in range(page_count):
+        while cached[i] is None:
+            batch, future = next(pending)
+            for page_index, text in zip(batch, future.result()):
+                cached[page_index] = text
+                page_cache.set(keys[page_index], text)
+        yield cached[i]
+
+
+def extract_pdf_text(data: bytes, workers: int = PDF_WORKERS) -> str:
+    """Extract text from the bytes of a PDF file"""
+    return " ".join(text for text in iter_pdf_pages(data, workers=workers) if text)
@@ -0,0 +1,231 @@
+"""Token budgets for prompts and completions.
+
+count_tokens estimates prompt size without loading a tokenizer. Retrieved
+context is de-duplicated (the splitter overlaps chunks by 50 characters),
+long resumes are cut down by section priority, and max_tokens per call site
+follows the completion sizes actually observed for that call site.
+"""
+import os
+import re
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+MODEL_CONTEXT_TOKENS = int(os.getenv("MODEL_CONTEXT_TOKENS", "32768"))
+MAX_OUTPUT_TOKENS = 4096
+
+# Tokens kept free for estimation error in count_tokens
+SAFETY_MARGIN = 256
+
+# Starting max_tokens per call site until enough completions have been observed. Extraction
+# starts at the full cap, since a cut-off extraction has to be thrown away and repeated.
+DEFAULT_MAX_TOKENS = {
+    "extract_info": MAX_OUTPUT_TOKENS,
+    "extract_info_repair": MAX_OUTPUT_TOKENS,
+    "answer_question": 768,
+    "extract_skills": 384,
+    "role_skills": 384,
+    "role_evaluation": 1024,
+    "ranking_required_skills": 384,
+    "ranking_write_up": 768,
+}
+MIN_OBSERVATIONS = 20
+# max_tokens is rounded up to this step so the response cache key does not change on every call
+MAX_TOKENS_STEP = 128
+
+# Resume sections in the order they are kept when a resume has to be shortened
+SECTION_PRIORITY = [
+    "header", "skills", "experience", "education", "projects", "summary", "certifications", "other",
+]
+_SECTION_HEADINGS = {
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tech stack"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history"),
+    "education": ("education", "academic background", "qualifications"),
+    "projects": ("projects", "personal projects", "academic projects"),
+    "summary": ("summary", "profile", "profile summary", "objective", "about me", "professional summary"),
+    "certifications": ("certifications", "certificates", "licenses", "awards", "achievements"),
+}
+_HEADING_LOOKUP = {heading: section for section, headings in _SECTION_HEADINGS.items() for heading in headings}
+
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate BPE token count: one per punctuation mark, one per ~6 word characters"""
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN_PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, preferring to end at a line break"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    total = 0
+    for match in _TOKEN_PIECE.finditer(text):
+        total += 1 + (len(match.group()) - 1) // 6
+        if total > max_tokens:
+            cut = text[:match.start()]
+            line_break = cut.rfind("\n")
+            if line_break > len(cut) * 0.8:
+                cut = cut[:line_break]
+            return cut.rstrip()
+    return text
+
+
+def _overlap(previous: str, current: str, min_overlap: int = 20) -> int:
+    """Length of the longest suffix of previous that is a prefix of current"""
+    limit = min(len(previous), len(current))
+    for size in range(limit, min_overlap - 1, -1):
+        if previous.endswith(current[:size]):
+            return size
+    return 0
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def dedupe_chunks(chunks: List[str], similarity: float = 0.9) -> List[str]:
+    """Drop duplicate or near-duplicate chunks and trim text repeated from chunk overlap"""
+    kept: List[str] = []
+    kept_words: List[set] = []
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if not chunk or any(chunk in previous for previous in kept):
+            continue
+        for previous in kept:
+            size = _overlap(previous, chunk)
+            if size:
+                chunk = chunk[size:].strip()
+        if not chunk:
+            continue
+        words = _words(chunk)
+        if words and any(len(words & other) / len(words | other) >= similarity for other in kept_words if other):
+            continue
+        kept.append(chunk)
+        kept_words.append(words)
+    return kept
+
+
+def _heading_section(line: str) -> Optional[str]:
+    stripped = line.strip().strip(":").strip().lower()
+    if not stripped or len(stripped) > 40:
+        return None
+    return _HEADING_LOOKUP.get(stripped)
+
+
+def split_resume_sections(text: str) -> List[Tuple[str, str]]:
+    """Split raw resume text into (section, text) blocks in original order"""
+    blocks: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.split("\n"):
+        section = _heading_section(line)
+        if section:
+            blocks.append((section, [line]))
+        else:
+            blocks[-1][1].append(line)
+    return [(section, "\n".join(lines)) for section, lines in blocks if "".join(lines).strip()]
+
+
+def fit_resume(text: str, max_tokens: int) -> str:
+    """Shorten a resume to max_tokens, keeping higher-priority sections whole first.
+
+    Sections are kept in SECTION_PRIORITY order. The first section that does
+    not fit is truncated, and lower-priority sections are dropped. Kept text
+    stays in its original order.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    blocks = split_resume_sections(text)
+    if len(blocks) <= 1:
+        return truncate_to_tokens(text, max_tokens)
+
+    order = sorted(range(len(blocks)), key=lambda i: SECTION_PRIORITY.index(blocks[i][0])
+                   if blocks[i][0] in SECTION_PRIORITY else len(SECTION_PRIORITY))
+    remaining = max_tokens
+    kept: Dict[int, str] = {}
+    for i in order:
+        if remaining <= 0:
+            break
+        block = blocks[i][1]
+        tokens = count_tokens(block)
+        if tokens <= remaining:
+            kept[i] = block
+            remaining -= tokens
+        else:
+            kept[i] = truncate_to_tokens(block, remaining)
+            remaining = 0
+    return "\n".join(kept[i] for i in sorted(kept) if kept[i])
+
+
+def input_budget(fixed_prompt: str, max_tokens: int) -> int:
+    """Tokens left for variable content once the fixed prompt and the completion are reserved"""
+    return MODEL_CONTEXT_TOKENS - count_tokens(fixed_prompt) - max_tokens - SAFETY_MARGIN
+
+
+class OutputBudget:
+    """Chooses max_tokens per call site from recently observed completion sizes"""
+
+    def __init__(self, window: int = 200):
+        self._observed: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, call_site: str, completion_tokens: int, truncated: bool = False):
+        """Record a completion size; truncated completions count as half again larger"""
+        if completion_tokens <= 0:
+            return
+        if truncated:
+            completion_tokens = int(completion_tokens * 1.5)
+        with self._lock:
+            self._observed[call_site].append(completion_tokens)
+
+    def max_tokens_for(self, call_site: str) -> int:
+        default = DEFAULT_MAX_TOKENS.get(call_site, MAX_OUTPUT_TOKENS)
+        with self._lock:
+            observed = sorted(self._observed.get(call_site, ()))
+        if len(observed) < MIN_OBSERVATIONS:
+            return default
+        p95 = observed[min(len(observed) - 1, int(len(observed) * 0.95))]
+        # Headroom over the 95th percentile, rounded up to a stable step
+        target = int(p95 * 1.25) + 32
+        target = -(-target // MAX_TOKENS_STEP) * MAX_TOKENS_STEP
+        return max(MAX_TOKENS_STEP, min(MAX_OUTPUT_TOKENS, target))
+
+
+output_budget = OutputBudget()
+
+
+def fit_request(prompt: str, max_tokens: int) -> Tuple[str, int]:
+    """Make a prompt and completion budget fit the model context instead of failing.
+
+    max_tokens shrinks first (down to a quarter of the request). If the prompt
+    alone is still too long, its middle is cut, since instructions sit at the
+    start and the question or closing instructions often at the end.
+    """
+    available = MODEL_CONTEXT_TOKENS - SAFETY_MARGIN
+    prompt_tokens = count_tokens(prompt)
+    if prompt_tokens + max_tokens <= available:
+        return prompt, max_tokens
+
+    min_output = max(64, max_tokens // 4)
+    if prompt_tokens + min_output <= available:
+        return prompt, available - prompt_tokens
+
+    keep = available - min_output
+    head = truncate_to_tokens(prompt, keep * 3 // 4)
+    tail = _tail_tokens(prompt, keep - count_tokens(head) - 8)
+    return f"{head}\n[...]\n{tail}", min_output
+
+
+def _tail_tokens(text: str, max_tokens: int) -> str:
+    """The last max_tokens worth of text"""
+    if max_tokens <= 0:
+        return ""
+    pieces = list(_TOKEN_PIECE.finditer(text))
+    total = 0
+    for match in reversed(pieces):
+        total += 1 + (len(match.group()) - 1) // 6
+        if total > max_tokens:
+            return text[match.end():].lstrip()
+    return text
@@ -1,27 +1,156 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.docstore.document import Document
-from utils import groq_generate 
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set
+from compact_index import INDEX_PRECISION, compact_index, index_bytes
+from embeddings import EMBEDDING_MODEL, get_embeddings
+from fast_path import router
+from lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+from prompt_budget import dedupe_chunks
+from semantic_cache import SemanticAnswerCache
+from skills import parse_skill_list
+from telemetry import span
+from utils import groq_generate, groq_generate_batch, groq_generate_stream
 
 class ResumeQASystem:
-    def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", " ", ""]
-        )
+    # Candidates fetched from each of the vector and lexical rankings before fusion
+    HYBRID_CANDIDATES = 8
+    CONTEXT_CHUNKS = 4
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, index_precision: str = INDEX_PRECISION):
+        # The embedding model is shared by the whole process; each instance only owns its index
+        self.model_name = model_name
+        # "float32", or "float16"/"pq" to keep the chunk vectors compact (see compact_index)
+        self.index_precision = index_precision
+        self._text_splitter = None
         self.db = None
+        # Normalized skills extracted with the resume at upload; None means extract them per question
+        self.candidate_skills: Optional[Set[str]] = None
+        # Parsed sections used by the fast path for contact and listing questions
+        self.extracted_data: Optional[Dict[str, Any]] = None
+        self.lexical: Optional[LexicalIndex] = None
+        # Answers to earlier questions about the current resume, matched by meaning
+        self.answer_cache = SemanticAnswerCache()
+
+    @property
+    def embeddings(self):
+        return get_embeddings(self.model_name)
+
+    @property
+    def text_splitter(self):
+        # LangChain is imported on first use, not when the app starts
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=500,
+                chunk_overlap=50,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        return self._text_splitter
         
+    def _reset_resume_data(self):
+        self.candidate_skills = None
+        self.extracted_data = None
+        self.lexical = None
+        self.answer_cache.clear()
+
+    def _compact_index(self):
+        if self.db is not None:
+            self.db.index = compact_index(self.db.index, self.index_precision)
+
+    def _chunk_texts(self) -> List[str]:
+        return [self.db.docstore.search(doc_id).page_content for doc_id in self.db.index_to_docstore_id.values()]
+
     def create_knowledge_base(self, text: str):
-        chunks = self.text_splitter.split_text(text)
-        documents = [Document(page_content=chunk) for chunk in chunks]
-        self.db = FAISS.from_documents(documents, self.embeddings)
+        from langchain.docstore.document import Document
+        from langchain.vectorstores import FAISS
+        self._reset_resume_data()
+        with span("index.chunking"):
+            chunks = self.text_splitter.split_text(text)
+            documents = [Document(page_content=chunk) for chunk in chunks]
+        with span("index.embedding"):
+            self.db = FAISS.from_documents(documents, self.embeddings)
+            self._compact_index()
+        with span("index.lexical"):
+            self.lexical = LexicalIndex(chunks)
+
+    def create_knowledge_base_from_pages(self, pages: Iterable[str],
+                                         on_page: Optional[Callable[[int], None]] = None) -> str:
+        """Build the index page by page while the pages are still being extracted.
+
+        on_page is called with the number of pages indexed so far after each page.
+        Returns the full text joined the same way as read_resume.
+        """
+        from langchain.docstore.document import Document
+        from langchain.vectorstores import FAISS
+        self.db = None
+        self._reset_resume_data()
+        texts = []
+        chunks = []
+        for count, page in enumerate(pages, 1):
+            if page:
+                texts.append(page)
+                with span("index.chunking"):
+                    page_chunks = self.text_splitter.split_text(page)
+                    documents = [Document(page_content=chunk) for chunk in page_chunks]
+                chunks.extend(page_chunks)
+                if documents:
+                    with span("index.embedding"):
+                        if self.db is None:
+                            self.db = FAISS.from_documents(documents, self.embeddings)
+                        else:
+                            self.db.add_documents(documents)
+            if on_page is not None:
+                on_page(count)
+        self._compact_index()
+        with span("index.lexical"):
+            self.lexical = LexicalIndex(chunks)
+        return " ".join(texts)
+
+    def save_knowledge_base(self, path: str):
+        """Save the current FAISS index to a directory"""
+        self.db.save_local(path)
+
+    def _load_index(self, path: str):
+        from langchain.vectorstores import FAISS
+        # The index files are written by this app, so pickle loading is safe here
+        self.db = FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+        self._compact_index()
+        # The keyword index is cheap to rebuild from the stored chunks, so it is not saved
+        with span("index.lexical"):
+            self.lexical = LexicalIndex(self._chunk_texts())
+
+    def load_knowledge_base(self, path: str):
+        """Load a FAISS index previously written by save_knowledge_base"""
+        self._reset_resume_data()
+        self._load_index(path)
+
+    def offload_knowledge_base(self, path: str):
+        """Save the index to path and free it; reload_knowledge_base brings it back"""
+        self.save_knowledge_base(path)
+        self.db = None
+        self.lexical = None
+
+    def reload_knowledge_base(self, path: str):
+        """Load an index written by offload_knowledge_base, keeping skills, sections and cached answers"""
+        self._load_index(path)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held for the current resume: vectors, chunk texts, keyword index, cached answers"""
+        size = self.answer_cache.memory_bytes()
+        if self.db is not None:
+            size += index_bytes(self.db.index) + sum(len(chunk) for chunk in self._chunk_texts())
+        if self.lexical is not None:
+            size += self.lexical.memory_bytes()
+        return size
+
+    def set_candidate_skills(self, skills: Optional[Iterable[str]]):
+        """Use skills stored with the resume instead of extracting them from retrieved context"""
+        self.candidate_skills = set(skills) if skills is not None else None
+
+    def set_extracted_data(self, extracted_data: Optional[Dict[str, Any]]):
+        """Let the fast path answer contact and section questions from the parsed resume"""
+        self.extracted_data = extracted_data
     
-    def extract_skills(self, text: str) -> set:
-        """Extract skills from text"""
-        prompt = f"""Extract only the technical and professional skills from this text. 
+    def _skills_prompt(self, text: str) -> str:
+        return f"""Extract only the technical and professional skills from this text. 
         Return them as a comma-separated list.
 
         Structure:
@@ -32,9 +161,14 @@ class ResumeQASystem:
         Do not add any more information other than skills
         Do not add Education or Awards or Certifications or Experience in this section
         Text: {text}"""
-        
-        skills_text = groq_generate(prompt)
-        return {skill.strip().lower() for skill in skills_text.split(',') if skill.strip()}
+
+    def _parse_skills(self, skills_text: str) -> set:
+        return parse_skill_list(skills_text)
+
+    def extract_skills(self, text: str) -> set:
+        """Extract skills from text"""
+        skills_text = groq_generate(self._skills_prompt(text), call_site="extract_skills")
+        return self._parse_skills(skills_text)
     
     def calculate_skill_match(self, required_skills: set, candidate_skills: set) -> float:
         """Calculate the percentage of required skills matched"""
@@ -43,20 +177,41 @@ class ResumeQASystem:
         matched_skills = required_skills.intersection(candidate_skills)
         return len(matched_skills) / len(required_skills) * 100
     
-    def answer_question(self, question: str) -> str:
-        if not self.db:
-            return "Please process a resume first."
-            
-        # Get relevant context
-        relevant_docs = self.db.similarity_search(question, k=4)
-        context = "\n".join(doc.page_content for doc in relevant_docs)
-        
-        # For role suitability questions, use special handling
+    def _retrieve_context(self, question: str, vector: Optional[List[float]] = None) -> str:
+        """Top chunks by reciprocal rank fusion of vector and BM25 rankings.
+
+        Pass the question's embedding as vector if it has already been computed.
+        """
+        with span("qa.retrieval"):
+            if vector is None:
+                vector = self.embeddings.embed_query(question)
+            if self.lexical is None:
+                chunks = [doc.page_content for doc in
+                          self.db.similarity_search_by_vector(vector, k=self.CONTEXT_CHUNKS)]
+            else:
+                vector_ranking = [doc.page_content for doc in
+                                  self.db.similarity_search_by_vector(vector, k=self.HYBRID_CANDIDATES)]
+                lexical_ranking = [self.lexical.chunks[i] for i, _ in
+                                   self.lexical.search(question, self.HYBRID_CANDIDATES)]
+                chunks = reciprocal_rank_fusion([vector_ranking, lexical_ranking])[:self.CONTEXT_CHUNKS]
+        # Neighbouring chunks share 50 characters of overlap; send each span of text once
+        return "\n".join(dedupe_chunks(chunks))
+
+    def _fast_answer(self, question: str) -> Optional[str]:
+        """Deterministic answer for simple factual questions, or None to use the LLM"""
         if self._is_role_suitability_question(question):
-            return self._evaluate_role_suitability(question, context)
-        
-        # For other questions, use standard prompt
-        prompt = f"""You are an AI assistant helping HR professionals analyze resumes. Answer the following question accurately based ONLY on the information provided in the resume context: {question}
+            return None
+        with span("qa.fast_path"):
+            return router.answer(question, self.extracted_data, self.candidate_skills)
+
+    def _question_terms(self, question: str) -> FrozenSet[str]:
+        """Question words that occur in the resume; paraphrases must agree on these"""
+        if self.lexical is None:
+            return frozenset()
+        return frozenset(token for token in tokenize(question) if token in self.lexical.postings)
+
+    def _answer_prompt(self, question: str, context: str) -> str:
+        return f"""You are an AI assistant helping HR professionals analyze resumes. Answer the following question accurately based ONLY on the information provided in the resume context: {question}
 
                     Resume Context:
                     {context}
@@ -73,7 +228,65 @@ class ResumeQASystem:
                     - Keep responses focused and precise
                     - Never invent or assume information"""
 
-        return groq_generate(prompt)
+    def answer_question(self, question: str) -> str:
+        if not self.db:
+            return "Please process a resume first."
+
+        fast_answer = self._fast_answer(question)
+        if fast_answer is not None:
+            return fast_answer
+
+        # One embedding serves both the answer cache lookup and retrieval
+        vector = self.embeddings.embed_query(question)
+        if self._is_role_suitability_question(question):
+            # Not cached: roles and skills the resume lacks do not show up in the question
+            # terms, so evaluations for different roles would look like paraphrases
+            return self._evaluate_role_suitability(question, self._retrieve_context(question, vector))
+
+        terms = self._question_terms(question)
+        with span("qa.semantic_cache"):
+            cached = self.answer_cache.lookup(vector, terms)
+        if cached is not None:
+            return cached[0]
+            
+        # Get relevant context
+        context = self._retrieve_context(question, vector)
+        answer = groq_generate(self._answer_prompt(question, context), call_site="answer_question")
+        self.answer_cache.store(question, vector, terms, answer)
+        return answer
+
+    def answer_question_stream(self, question: str) -> Iterator[str]:
+        """Same as answer_question, but yields the answer in pieces as it is generated"""
+        if not self.db:
+            yield "Please process a resume first."
+            return
+
+        fast_answer = self._fast_answer(question)
+        if fast_answer is not None:
+            yield fast_answer
+            return
+
+        vector = self.embeddings.embed_query(question)
+        if self._is_role_suitability_question(question):
+            # Not cached, as in answer_question
+            yield from self._evaluate_role_suitability_stream(question, self._retrieve_context(question, vector))
+            return
+
+        terms = self._question_terms(question)
+        with span("qa.semantic_cache"):
+            cached = self.answer_cache.lookup(vector, terms)
+        if cached is not None:
+            yield cached[0]
+            return
+
+        context = self._retrieve_context(question, vector)
+        parts = []
+        for part in groq_generate_stream(self._answer_prompt(question, context), call_site="answer_question"):
+            parts.append(part)
+            yield part
+        # A failed stream ends with an "Error: ..." piece after whatever arrived before it
+        if parts and not parts[-1].lstrip().startswith("Error:"):
+            self.answer_cache.store(question, vector, terms, "".join(parts))
     
     def _is_role_suitability_question(self, question: str) -> bool:
         """Check if question is about role suitability"""
@@ -81,17 +294,23 @@ class ResumeQASystem:
                    'appropriate for', 'good candidate for', 'consider for']
         return any(keyword in question.lower() for keyword in keywords)
     
-    def _evaluate_role_suitability(self, question: str, context: str) -> str:
-        """Evaluate candidate's suitability for a role"""
+    def _role_suitability_prompt(self, question: str, context: str) -> str:
+        """Build the final evaluation prompt for a role suitability question"""
         # Extract required skills from question
         prompt_required = f"""Extract the required skills or qualifications mentioned in this question. 
         Return only the technical and professional skills as a comma-separated list.
         Question: {question}"""
-        required_skills_text = groq_generate(prompt_required)
-        required_skills = {skill.strip().lower() for skill in required_skills_text.split(',') if skill.strip()}
-        
-        # Extract candidate's skills from resume
-        candidate_skills = self.extract_skills(context)
+        if self.candidate_skills is not None:
+            # Skills from upload-time extraction cover the whole resume, not just the retrieved chunks
+            required_skills = self._parse_skills(groq_generate(prompt_required, call_site="role_skills"))
+            candidate_skills = self.candidate_skills
+        else:
+            # Required and candidate skills are independent, so extract both concurrently
+            required_skills_text, candidate_skills_text = groq_generate_batch(
+                [prompt_required, self._skills_prompt(context)], call_sites=["role_skills", "extract_skills"]
+            )
+            required_skills = self._parse_skills(required_skills_text)
+            candidate_skills = self._parse_skills(candidate_skills_text)
         
         # Calculate match percentage
         match_percentage = self.calculate_skill_match(required_skills, candidate_skills)
@@ -113,5 +332,19 @@ class ResumeQASystem:
                 4. Additional Relevant Experience (from resume context)
 
                 Format as bullet points. Be specific and reference only information from the resume."""
+        return prompt
+
+    def evaluate_role_suitability(self, question: str) -> str:
+        """Evaluate how well the candidate fits the role named in question"""
+        if not self.db:
+            return "Please process a resume first."
+        return self._evaluate_role_suitability(question, self._retrieve_context(question))
+
+    def _evaluate_role_suitability(self, question: str, context: str) -> str:
+        """Evaluate candidate's suitability for a role"""
+        return groq_generate(self._role_suitability_prompt(question, context), call_site="role_evaluation")
 
-        return groq_generate(prompt)
\ No newline at end of file
+    def _evaluate_role_suitability_stream(self, question: str, context: str) -> Iterator[str]:
+        """Streaming variant of _evaluate_role_suitability; only the final evaluation is streamed"""
+        yield from groq_generate_stream(self._role_suitability_prompt(question, context),
+                                        call_site="role_evaluation")
@@ -0,0 +1,263 @@
+"""Rank a pool of stored resumes against one job description.
+
+Usage:
+    python ranking.py ranking/ job_description.txt --top-k 10
+"""
+import argparse
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from corpus_index import section_texts
+from embeddings import EMBEDDING_MODEL, embedding_version, get_embeddings
+from skills import parse_skill_list, skills_from_extracted_data
+from utils import groq_generate, groq_generate_batch
+
+STATE_FILE = "ranking.json"
+PROFILES_FILE = "profiles.npy"
+
+# Characters of each resume used for its profile embedding
+PROFILE_CHARS = 4000
+
+
+class RankingError(Exception):
+    """The LLM call extracting a job's required skills failed"""
+
+
+class RankingEngine:
+    """Skill sets and profile embeddings of many resumes, scored against a job in one pass.
+
+    Skills are normalized once at ingestion and encoded as rows of a sparse
+    resume x skill-vocabulary matrix. Ranking a job description is then one
+    sparse mat-vec for skill coverage plus one dense mat-vec for embedding
+    similarity. The LLM is only called to extract the job's required skills
+    and to write up the final top-k candidates. New profile rows are collected
+    in a list and stacked onto the matrix once, on the next score or save.
+    """
+
+    def __init__(self, directory: str, model_name: str = EMBEDDING_MODEL):
+        self.directory = directory
+        self.model_name = model_name
+        self.resume_ids: List[str] = []
+        self.skills: Dict[str, List[str]] = {}
+        self.summaries: Dict[str, str] = {}
+        self._rows: Dict[str, int] = {}
+        self._profiles: Optional[np.ndarray] = None
+        self._new_profiles: List[np.ndarray] = []
+        self._matrix = None
+        self._vocab: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        state_path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(state_path):
+            return
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        # Profiles only compare with job descriptions encoded by the same embeddings
+        version = embedding_version(self.model_name)
+        if state.get("embeddings", version) != version:
+            raise ValueError(f"Ranking data in {self.directory} was built with {state['embeddings']} embeddings, "
+                             f"not {version}; use the same EMBEDDING_BACKEND and EMBEDDING_MODEL or a new directory")
+        self.resume_ids = state["resume_ids"]
+        self.skills = state["skills"]
+        self.summaries = state["summaries"]
+        self._rows = {resume_id: row for row, resume_id in enumerate(self.resume_ids)}
+        profiles_path = os.path.join(self.directory, PROFILES_FILE)
+        if os.path.exists(profiles_path):
+            self._profiles = np.load(profiles_path)
+            if len(self._profiles) != len(self.resume_ids):
+                raise ValueError(f"{PROFILES_FILE} in {self.directory} does not match {STATE_FILE}; "
+                                 "the last save was interrupted, re-ingest the resumes")
+
+    @property
+    def profiles(self) -> Optional[np.ndarray]:
+        """Profile embeddings, one row per entry of resume_ids"""
+        with self._lock:
+            return self._stacked_profiles()
+
+    def _stacked_profiles(self) -> Optional[np.ndarray]:
+        # Call with the lock held
+        if self._new_profiles:
+            rows = ([self._profiles] if self._profiles is not None else []) + self._new_profiles
+            self._profiles = np.vstack(rows)
+            self._new_profiles = []
+        return self._profiles
+
+    def save(self):
+        """Write both files to temporary paths and move them into place, profiles first"""
+        with self._lock:
+            profiles = self._stacked_profiles()
+            if profiles is not None:
+                tmp_path = os.path.join(self.directory, PROFILES_FILE + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, profiles)
+                os.replace(tmp_path, os.path.join(self.directory, PROFILES_FILE))
+            tmp_path = os.path.join(self.directory, STATE_FILE + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"embeddings": embedding_version(self.model_name), "resume_ids": self.resume_ids,
+                           "skills": self.skills, "summaries": self.summaries}, f)
+            os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(get_embeddings(self.model_name).embed_documents(texts), dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add_resume(self, resume_id: str, extracted_data: Dict[str, Any],
+                   skills: Optional[Iterable[str]] = None):
+        """Store the normalized skill set and profile embedding of a parsed resume"""
+        skill_list = sorted(parse_skill_list(",".join(skills))) if skills is not None \
+            else skills_from_extracted_data(extracted_data)
+        profile_text = "\n\n".join(section_texts(extracted_data).values())[:PROFILE_CHARS]
+        vector = self._embed([profile_text or resume_id])
+
+        with self._lock:
+            self.skills[resume_id] = skill_list
+            self.summaries[resume_id] = profile_text
+            row = self._rows.get(resume_id)
+            if row is None:
+                self._rows[resume_id] = len(self.resume_ids)
+                self.resume_ids.append(resume_id)
+                self._new_profiles.append(vector[0])
+            else:
+                self._stacked_profiles()[row] = vector[0]
+            self._matrix = None
+
+    def remove_resume(self, resume_id: str):
+        with self._lock:
+            row = self._rows.pop(resume_id, None)
+            if row is None:
+                return
+            profiles = self._stacked_profiles()
+            self.resume_ids.pop(row)
+            self.skills.pop(resume_id, None)
+            self.summaries.pop(resume_id, None)
+            self._profiles = np.delete(profiles, row, axis=0)
+            for later_id in self.resume_ids[row:]:
+                self._rows[later_id] -= 1
+            self._matrix = None
+
+    def _skill_matrix(self):
+        """Build (or reuse) the binary resume x skill matrix"""
+        if self._matrix is None:
+            vocab: Dict[str, int] = {}
+            rows, cols = [], []
+            for row, resume_id in enumerate(self.resume_ids):
+                for skill in self.skills[resume_id]:
+                    rows.append(row)
+                    cols.append(vocab.setdefault(skill, len(vocab)))
+            self._vocab = vocab
+            self._matrix = sparse.csr_matrix(
+                (np.ones(len(rows), dtype="float32"), (rows, cols)),
+                shape=(len(self.resume_ids), max(len(vocab), 1))
+            )
+        return self._matrix, self._vocab
+
+    def score(self, required_skills: Iterable[str], job_description: str,
+              skill_weight: float = 0.6) -> Dict[str, np.ndarray]:
+        """Skill match percentage, embedding similarity and combined score for every resume"""
+        with self._lock:
+            if not self.resume_ids:
+                empty = np.zeros(0, dtype="float32")
+                return {"skill_match": empty, "similarity": empty, "combined": empty}
+            matrix, vocab = self._skill_matrix()
+            profiles = self._stacked_profiles()
+
+        required = {skill for skill in required_skills if skill}
+        required_vector = np.zeros(matrix.shape[1], dtype="float32")
+        for skill in required:
+            if skill in vocab:
+                required_vector[vocab[skill]] = 1.0
+        # Same definition as ResumeQASystem.calculate_skill_match, for the whole pool at once
+        skill_match = matrix @ required_vector / len(required) * 100 if required \
+            else np.zeros(matrix.shape[0], dtype="float32")
+
+        similarity = profiles @ self._embed([job_description])[0]
+        combined = skill_weight * skill_match / 100 + (1 - skill_weight) * np.clip(similarity, 0, 1)
+        return {"skill_match": skill_match, "similarity": similarity, "combined": combined}
+
+    def rank(self, job_description: str, top_k: int = 10, skill_weight: float = 0.6,
+             write_ups: bool = True) -> List[Dict[str, Any]]:
+        """Return the top_k resumes for a job description, best first"""
+        prompt_required = f"""Extract the required skills or qualifications mentioned in this job description.
+        Return only the technical and professional skills as a comma-separated list.
+        Job Description: {job_description}"""
+        response = groq_generate(prompt_required, call_site="ranking_required_skills")
+        if response.startswith("Error:"):
+            raise RankingError(f"Could not extract the required skills: {response}")
+        required_skills = parse_skill_list(response)
+
+        scores = self.score(required_skills, job_description, skill_weight)
+        combined = scores["combined"]
+        if len(combined) == 0:
+            return []
+        top_k = min(top_k, len(combined))
+        top = np.argpartition(-combined, top_k - 1)[:top_k]
+        top = top[np.argsort(-combined[top])]
+
+        results = []
+        for row in top:
+            resume_id = self.resume_ids[row]
+            candidate_skills = set(self.skills[resume_id])
+            results.append({
+                "resume_id": resume_id,
+                "score": float(combined[row]),
+                "skill_match": float(scores["skill_match"][row]),
+                "similarity": float(scores["similarity"][row]),
+                "matched_skills": sorted(required_skills & candidate_skills),
+                "missing_skills": sorted(required_skills - candidate_skills),
+            })
+
+        if write_ups:
+            prompts = [self._write_up_prompt(job_description, result) for result in results]
+            for result, write_up in zip(results, groq_generate_batch(prompts, call_site="ranking_write_up")):
+                result["write_up"] = write_up
+        return results
+
+    def _write_up_prompt(self, job_description: str, result: Dict[str, Any]) -> str:
+        return f"""Analyze the candidate's suitability for the role based on the following information:
+
+                Job Description: {job_description}
+                Matching Skills: {', '.join(result['matched_skills'])}
+                Missing Skills: {', '.join(result['missing_skills'])}
+                Skill Match: {result['skill_match']:.1f}%
+
+                Resume Summary:
+                {self.summaries[result['resume_id']]}
+
+                Provide a structured evaluation with:
+                1. **My suggestion**: Overall Assessment (Strong Match/Moderate Match/Limited Match) with summary in 2 lines strictly.
+                2. Key Matching Skills (3-4 most relevant matches)
+                3. Notable Gaps (if any)
+
+                Format as bullet points. Be specific and reference only information from the resume."""
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rank stored resumes against a job description")
+    parser.add_argument("ranking_dir", help="Directory written by batch_ingest.py --ranking-dir")
+    parser.add_argument("job_description", help="Text file containing the job description")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--skill-weight", type=float, default=0.6,
+                        help="Weight of skill coverage versus embedding similarity")
+    parser.add_argument("--no-write-ups", action="store_true", help="Skip the LLM write-ups")
+    args = parser.parse_args(argv)
+
+    with open(args.job_description, "r", encoding="utf-8") as f:
+        job_description = f.read()
+    engine = RankingEngine(args.ranking_dir)
+    try:
+        results = engine.rank(job_description, args.top_k, args.skill_weight, not args.no_write_ups)
+    except RankingError as e:
+        parser.exit(1, f"{e}\n")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for rate limiting (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    reserve() always succeeds and returns how long the caller must wait before
+    using the tokens. The balance may go negative, which makes later callers
+    wait in the order they reserved.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) tokens after the real usage is known"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by the sync and async clients.
+
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def refund(self, tokens: int):
+        """Give back the tokens reserved for a request that failed before using any"""
+        if self.tokens:
+            self.tokens.adjust(tokens)
+
+    def record_usage(self, reserved: int, used: int):
+        """Correct the token bucket with the usage reported by the API"""
+        if self.tokens and used:
+            self.tokens.adjust(reserved - used)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0,
+                  retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, honouring a server supplied Retry-After"""
+    if retry_after is not None:
+        return min(cap, retry_after) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "RESUME_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "smart_resume_analyzer", "resumes")
+)
+DEFAULT_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+META_FILE = "meta.json"
+INDEX_DIR = "index"
+
+
+def content_key(data: bytes, version: str = "") -> str:
+    """Hash of the file bytes and the parser and embeddings version, also the service's resume id"""
+    digest = hashlib.sha256()
+    digest.update(version.encode())
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ResumeCache:
+    """Content-addressed on-disk cache of processed resumes with LRU eviction.
+
+    Each entry is a directory named after the hash of the file bytes and the
+    version, which covers the parser and the embeddings of the index. It holds
+    the extracted text, the parsed sections and the saved FAISS index. The
+    modification time of the meta file is the last access time used for
+    eviction.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: str = ""):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        # Size as of the last scan, kept so that stats() never walks the cache directory
+        self.entry_count = 0
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._evict()
+
+    def make_key(self, data: bytes) -> str:
+        """Hash the file bytes together with the cache version"""
+        return content_key(data, self.version)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key, or None on a miss"""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Touch the meta file so eviction sees this entry as recently used
+            os.utime(meta_path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry.setdefault("skills", None)
+        index_path = os.path.join(entry_dir, INDEX_DIR)
+        entry["index_path"] = index_path if os.path.isdir(index_path) else None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, resume_text: str, extracted_data: Dict[str, Any], qa_system=None,
+            skills: Optional[List[str]] = None):
+        """Store a processed resume with its skills, including the FAISS index of qa_system if given"""
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{key}-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump({"resume_text": resume_text, "extracted_data": extracted_data,
+                           "skills": skills}, f)
+            if qa_system is not None and qa_system.db is not None:
+                qa_system.save_knowledge_base(os.path.join(tmp_dir, INDEX_DIR))
+
+            entry_dir = self._entry_dir(key)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._evict(keep=key)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """List (last access, size in bytes, key) for every complete entry"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(name)
+            meta_path = os.path.join(entry_dir, META_FILE)
+            if name.startswith(".") or not os.path.isfile(meta_path):
+                continue
+            size = 0
+            for root, _, files in os.walk(entry_dir):
+                for file_name in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file_name))
+                    except OSError:
+                        pass
+            try:
+                entries.append((os.path.getmtime(meta_path), size, name))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self, keep: Optional[str] = None):
+        """Drop least recently used entries until the cache fits in max_bytes and update the size"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            count = len(entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                shutil.rmtree(self._entry_dir(name), ignore_errors=True)
+                total -= size
+                count -= 1
+            self.entry_count = count
+            self.total_bytes = total
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counts and the size of the cache as of the last put"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": self.entry_count,
+                "bytes": self.total_bytes,
+            }
@@ -0,0 +1,499 @@
+import functools
+import json
+import os
+import re
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from pdf_pages import PDF_WORKERS, extract_pdf_text, iter_pdf_pages
+from prompt_budget import MAX_OUTPUT_TOKENS, fit_resume, input_budget, output_budget
+from skills import parse_skill_list, skills_from_extracted_data
+from utils import TRUNCATED_ERROR, groq_generate
+
+# Bump whenever the extraction prompt or parse_llm_response changes so that
+# cached results from older versions are not reused
+PARSER_VERSION = "3"
+
+# "json" asks for one schema-validated JSON object; "text" uses the free-text format and line parser
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "json").lower()
+# Extra attempts after a malformed JSON response, each with the validation error fed back
+EXTRACTION_RETRIES = int(os.getenv("EXTRACTION_RETRIES", "1"))
+
+class ExtractionError(Exception):
+    """The LLM call of a resume extraction failed"""
+
+def iter_resume_pages(uploaded_file, workers: int = PDF_WORKERS) -> Iterator[str]:
+    """Yield the text of an uploaded resume page by page as it is extracted"""
+    if uploaded_file.type == "application/pdf":
+        yield from iter_pdf_pages(uploaded_file.getvalue(), workers=workers)
+    else:
+        yield uploaded_file.getvalue().decode()
+
+def read_resume(uploaded_file, workers: int = PDF_WORKERS) -> str:
+    """Extract text from uploaded resume file"""
+    if uploaded_file.type == "application/pdf":
+        text = extract_pdf_text(uploaded_file.getvalue(), workers=workers)
+    else:
+        text = uploaded_file.getvalue().decode()
+    return text
+
+# Bullet characters the extraction prompt and the LLM use for list items
+BULLETS = ('•', '-', '*', '○', '·', '►', '▪', '➢')
+BULLET_STRIP = '•-*○·►▪➢ '
+
+SECTION_MARKERS = {
+    "name:": ("Basic Info", "Name"),
+    "email:": ("Basic Info", "Email"),
+    "phone:": ("Basic Info", "Phone"),
+    "phone number:": ("Basic Info", "Phone"),
+    "profile summary:": ("Profile Summary", None),
+    "summary:": ("Profile Summary", None),
+    "work experience:": ("Work Experience", None),
+    "employment:": ("Work Experience", None),
+    "education:": ("Education", None),
+    "technical skills:": ("Technical Skills", None),
+    "skills:": ("Technical Skills", None),
+    "projects:": ("Projects", None),
+    "certificates:": ("Certificates", None),
+    "certifications:": ("Certificates", None)
+}
+
+# One alternation over all markers, matched against the lowercased line. No
+# marker is a prefix of another, so at most one alternative can match.
+_SECTION_PATTERN = re.compile("|".join(re.escape(marker) for marker in SECTION_MARKERS))
+
+def _store_section(sections: Dict[str, Any], section: str, subsection: Optional[str], lines: List[str]):
+    """Save the collected lines of a section into the parsed structure"""
+    if section == "Work Experience":
+        sections[section] = _parse_work_experience_lines(lines)
+    elif section == "Projects":
+        sections[section] = _parse_projects_lines(lines)
+    elif section == "Basic Info" and subsection:
+        sections[section][subsection] = '\n'.join(lines).strip()
+    else:
+        sections[section] = '\n'.join(lines).strip()
+
+def parse_llm_response(text: str) -> Dict[str, Any]:
+    """Parse the LLM response with improved work experience handling and certificates section"""
+    sections = {
+       "Basic Info": {  # Changed to nested structure for basic info
+            "Name": "",
+            "Email": "",
+            "Phone": ""
+        },
+        "Profile Summary": "",
+        "Work Experience": [],  # Changed to list to store multiple experiences
+        "Education": "",
+        "Technical Skills": "",
+        "Projects": [],
+        "Certificates": ""  # Added certificates section
+    }
+
+    current_section = None
+    current_subsection = None
+    section_content = []
+    match_marker = _SECTION_PATTERN.match
+
+    # Single pass: each line is stripped, lowercased and matched once
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        match = match_marker(line.lower())
+        if match:
+            # Save content from previous section if it exists
+            if current_section and section_content:
+                _store_section(sections, current_section, current_subsection, section_content)
+
+            # Start new section
+            marker = match.group(0)
+            current_section, current_subsection = SECTION_MARKERS[marker]
+            content = line[len(marker):].strip()
+            section_content = [content] if content else []
+        elif current_section:
+            # Add line to current section
+            section_content.append(line)
+
+    # Save the last section's content
+    if current_section and section_content:
+        _store_section(sections, current_section, current_subsection, section_content)
+
+    return sections
+
+def parse_work_experience(text: str) -> List[Dict[str, Any]]:
+    """Parse work experience with improved company and responsibility detection"""
+    return _parse_work_experience_lines(text.split('\n'))
+
+def _parse_work_experience_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    experiences = []
+    current_exp = None
+    current_responsibilities = []
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        is_bullet = line.startswith(BULLETS)
+
+        # Check for new company entry (bulleted or not, with a date in parentheses)
+        if '(' in line and ')' in line:
+            # Save previous experience if exists
+            if current_exp and current_responsibilities:
+                current_exp['responsibilities'] = current_responsibilities
+                experiences.append(current_exp)
+
+            # Clean up the line
+            if is_bullet:
+                line = line[1:].strip()
+
+            # Parse company info
+            try:
+                company_part, date_part = line.split('(', 1)
+                date_part = date_part.rstrip(')')
+
+                # Split location if present
+                if ',' in date_part:
+                    date_info, location = date_part.rsplit(',', 1)
+                else:
+                    date_info, location = date_part, ""
+
+                current_exp = {
+                    'company': company_part.strip(),
+                    'duration': date_info.strip(),
+                    'location': location.strip(),
+                    'responsibilities': []
+                }
+            except ValueError:
+                # Handle malformed lines
+                current_exp = {
+                    'company': line,
+                    'duration': '',
+                    'location': '',
+                    'responsibilities': []
+                }
+            current_responsibilities = []
+
+        # Check for responsibility
+        elif is_bullet and current_exp:
+            resp = line.lstrip(BULLET_STRIP).strip()
+            if resp:
+                current_responsibilities.append(resp)
+
+    # Add final experience
+    if current_exp and current_responsibilities:
+        current_exp['responsibilities'] = current_responsibilities
+        experiences.append(current_exp)
+
+    return experiences
+
+# Words that mark a bulleted line as a project detail rather than a title
+_PROJECT_DETAIL_WORDS = ("technologies:", "developed", "implemented", "built")
+
+def parse_projects(text: str) -> List[Dict[str, Any]]:
+    """Parse projects into structured format"""
+    return _parse_projects_lines(text.split('\n'))
+
+def _parse_projects_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    projects = []
+    current_project = None
+    current_details = []
+    line_count = len(lines)
+
+    for i in range(line_count):
+        line = lines[i].strip()
+
+        # Only bulleted lines can be project titles or details
+        if not line.startswith(BULLETS):
+            continue
+        clean_line = line.lstrip(BULLET_STRIP).strip()
+
+        # A bulleted line followed by more bullets is a detail if it reads like one
+        is_title = True
+        if i + 1 < line_count and lines[i + 1].strip().startswith(BULLETS):
+            clean_lower = clean_line.lower()
+            if any(word in clean_lower for word in _PROJECT_DETAIL_WORDS):
+                is_title = False
+
+        if is_title:
+            # Save previous project if exists
+            if current_project and current_details:
+                current_project['details'] = current_details
+                projects.append(current_project)
+
+            # Start new project
+            current_project = {
+                'title': clean_line,
+                'details': []
+            }
+            current_details = []
+        elif current_project:
+            current_details.append(clean_line)
+
+    # Add final project
+    if current_project and current_details:
+        current_project['details'] = current_details
+        projects.append(current_project)
+
+    return projects
+
+def _extraction_prompt(resume_text: str) -> str:
+    return f"""
+    Please analyze the following resume and extract the information in this exact format with clear section headers:
+
+    Name: [Full Name]
+    Email: [Email Address]
+    Phone: [Phone Number]
+    Profile Summary: [Detailed profile summary]
+    Work Experience: [List each position in this format:
+    • Company Name (Duration, Location)
+    * Responsibility 1
+    * Responsibility 2
+    * Responsibility 3
+    ]
+    Education: [Detailed education history]
+    Technical Skills: [List of technical skills]
+    Projects: [List each project in this format:
+    * Project Title
+    * Detail 1
+    * Detail 2
+    * Technologies: List of technologies used
+    ]
+    Certificates: [List of certificates and certifications]
+
+    Important: 
+    - For Work Experienc or experience, first try to find company name and then find bullet points below it. Maintain the bullet point format exactly as shown above. Do this for every company you can find.
+    - For Projects, ensure each project title is on its own line with a bullet point, followed by details on separate lines
+
+    Resume Text: {resume_text}
+    """
+
+def _generate_extraction(call_site: str, generate: Callable[[int], str]) -> str:
+    """generate(max_tokens) with the cap learned for call_site, repeated with the full cap if
+    the response was cut off. A cut-off response is an error, never a partial extraction."""
+    max_tokens = output_budget.max_tokens_for(call_site)
+    response = generate(max_tokens)
+    if response == TRUNCATED_ERROR and max_tokens < MAX_OUTPUT_TOKENS:
+        response = generate(MAX_OUTPUT_TOKENS)
+    return response
+
+def _extract_info_text(resume_text: str) -> Dict[str, Any]:
+    """Free-text extraction parsed line by line with parse_llm_response"""
+    def generate(max_tokens: int) -> str:
+        # Long resumes are cut down by section priority so the prompt always fits the model context
+        text = fit_resume(resume_text, input_budget(_extraction_prompt(""), max_tokens))
+        return groq_generate(_extraction_prompt(text), max_tokens=max_tokens, call_site="extract_info")
+
+    raw_extracted_text = _generate_extraction("extract_info", generate)
+    if raw_extracted_text.startswith("Error:"):
+        raise ExtractionError(raw_extracted_text)
+    parsed_data = parse_llm_response(raw_extracted_text)
+    return parsed_data
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+# The parse_llm_response structure plus the candidate's skills as a flat list
+RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Basic Info": {
+            "type": "object",
+            "properties": {"Name": _STRING, "Email": _STRING, "Phone": _STRING},
+            "required": ["Name", "Email", "Phone"],
+        },
+        "Profile Summary": _STRING,
+        "Work Experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"company": _STRING, "duration": _STRING, "location": _STRING,
+                               "responsibilities": _STRING_LIST},
+                "required": ["company", "duration", "location", "responsibilities"],
+            },
+        },
+        "Education": _STRING,
+        "Technical Skills": _STRING,
+        "Projects": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"title": _STRING, "details": _STRING_LIST},
+                "required": ["title", "details"],
+            },
+        },
+        "Certificates": _STRING,
+        "Skills": _STRING_LIST,
+    },
+    "required": ["Basic Info", "Profile Summary", "Work Experience", "Education",
+                 "Technical Skills", "Projects", "Certificates", "Skills"],
+}
+
+@functools.lru_cache(maxsize=None)
+def _resume_validator():
+    # jsonschema is only imported once the first JSON response needs validating
+    import jsonschema
+    return jsonschema.Draft7Validator(RESUME_SCHEMA)
+
+_JSON_FORMAT = {"type": "json_object"}
+
+_JSON_EXAMPLE = json.dumps({
+    "Basic Info": {"Name": "Full Name", "Email": "Email Address", "Phone": "Phone Number"},
+    "Profile Summary": "Detailed profile summary",
+    "Work Experience": [{"company": "Company Name", "duration": "Duration", "location": "Location",
+                         "responsibilities": ["Responsibility 1", "Responsibility 2"]}],
+    "Education": "Detailed education history",
+    "Technical Skills": "Technical skills as written in the resume",
+    "Projects": [{"title": "Project Title", "details": ["Detail 1", "Technologies: ..."]}],
+    "Certificates": "Certificates and certifications, one per line",
+    "Skills": ["Python", "SQL"],
+}, indent=2)
+
+def _json_extraction_prompt(resume_text: str) -> str:
+    return f"""
+    Extract the information in the resume below into a single JSON object with exactly these keys:
+
+    {_JSON_EXAMPLE}
+
+    Important:
+    - Use an empty string or empty list when a section is missing. Do not invent information.
+    - Add one Work Experience entry for every company you can find, with its bullet points as responsibilities.
+    - "Skills" lists every technical and professional skill the candidate has, one skill per item,
+      taken from the whole resume (skills section, experience and projects).
+    - Return only the JSON object.
+
+    Resume Text: {resume_text}
+    """
+
+def _repair_prompt(response: str, error: str) -> str:
+    return f"""
+    The following JSON does not match the required format: {error}
+
+    Return only a corrected JSON object with exactly these keys:
+
+    {_JSON_EXAMPLE}
+
+    JSON to correct: {response}
+    """
+
+def _load_json_object(text: str) -> Any:
+    """Parse the JSON object in an LLM response, tolerating code fences and trailing commas"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in response")
+    text = text[start:end + 1]
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(re.sub(r",\s*([}\]])", r"\1", text))
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(_as_text(item) for item in value if item)
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {_as_text(v)}" for k, v in value.items() if v)
+    return str(value).strip()
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [line.lstrip(BULLET_STRIP).strip() for line in value.split("\n")]
+    elif not isinstance(value, list):
+        value = [value]
+    return [text for text in (_as_text(item) for item in value) if text]
+
+def _coerce(data: Any) -> Any:
+    """Fix the slips LLMs commonly make (lists for strings, null or omitted sections) before validation"""
+    if not isinstance(data, dict) or not any(key in data for key in RESUME_SCHEMA["properties"]):
+        return data
+    data = dict(data)
+    basic = data.get("Basic Info")
+    basic = basic if isinstance(basic, dict) else {}
+    data["Basic Info"] = {field: _as_text(basic.get(field)) for field in ("Name", "Email", "Phone")}
+    for key in ("Profile Summary", "Education", "Technical Skills", "Certificates"):
+        data[key] = _as_text(data.get(key))
+    data["Skills"] = _as_list(data.get("Skills"))
+    if isinstance(data.get("Work Experience"), list):
+        data["Work Experience"] = [
+            {"company": _as_text(exp.get("company")), "duration": _as_text(exp.get("duration")),
+             "location": _as_text(exp.get("location")),
+             "responsibilities": _as_list(exp.get("responsibilities"))}
+            for exp in data["Work Experience"] if isinstance(exp, dict)
+        ]
+    elif isinstance(data.get("Work Experience"), str):
+        data["Work Experience"] = _parse_work_experience_lines(data["Work Experience"].split("\n"))
+    elif data.get("Work Experience") is None:
+        data["Work Experience"] = []
+    if isinstance(data.get("Projects"), list):
+        data["Projects"] = [
+            {"title": _as_text(project.get("title")), "details": _as_list(project.get("details"))}
+            for project in data["Projects"] if isinstance(project, dict)
+        ]
+    elif isinstance(data.get("Projects"), str):
+        data["Projects"] = _parse_projects_lines(data["Projects"].split("\n"))
+    elif data.get("Projects") is None:
+        data["Projects"] = []
+    return data
+
+def parse_json_extraction(text: str) -> Dict[str, Any]:
+    """Parse and validate a JSON extraction response; raises ValueError if it cannot be repaired"""
+    from jsonschema.exceptions import best_match
+    data = _coerce(_load_json_object(text))
+    error = best_match(_resume_validator().iter_errors(data))
+    if error is not None:
+        path = "/".join(str(part) for part in error.absolute_path) or "root"
+        raise ValueError(f"{path}: {error.message}")
+    return data
+
+def _split_skills(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Separate the normalized skill list from the parse_llm_response sections"""
+    sections = {key: data[key] for key in RESUME_SCHEMA["properties"] if key != "Skills"}
+    skills = parse_skill_list(",".join(data["Skills"])) | set(skills_from_extracted_data(sections))
+    return sections, sorted(skills)
+
+def _extract_resume_json(resume_text: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+    """One JSON-mode extraction call, plus repair calls for malformed output.
+
+    Returns None if the output cannot be repaired and raises ExtractionError if the LLM call fails.
+    """
+    def generate(max_tokens: int) -> str:
+        text = fit_resume(resume_text, input_budget(_json_extraction_prompt(""), max_tokens))
+        return groq_generate(_json_extraction_prompt(text), max_tokens=max_tokens,
+                            call_site="extract_info", response_format=_JSON_FORMAT)
+
+    response = _generate_extraction("extract_info", generate)
+    for attempt in range(EXTRACTION_RETRIES + 1):
+        if response.startswith("Error:"):
+            # The API itself failed, so the free-text fallback would fail the same way
+            raise ExtractionError(response)
+        try:
+            return _split_skills(parse_json_extraction(response))
+        except ValueError as e:
+            if attempt == EXTRACTION_RETRIES:
+                return None
+            prompt = _repair_prompt(response, str(e))
+            response = _generate_extraction("extract_info_repair", lambda max_tokens: groq_generate(
+                prompt, max_tokens=max_tokens, call_site="extract_info_repair", response_format=_JSON_FORMAT))
+
+def extract_resume(resume_text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Extract the resume sections and the candidate's normalized skills.
+
+    In json mode this is a single schema-validated call. If the response
+    cannot be repaired, the free-text extraction is used instead and the
+    skills are taken from its Technical Skills section. Raises
+    ExtractionError when the LLM call fails, so that callers never store
+    empty sections as a successful result.
+    """
+    if EXTRACTION_MODE == "json":
+        result = _extract_resume_json(resume_text)
+        if result is not None:
+            return result
+    extracted_data = _extract_info_text(resume_text)
+    return extracted_data, skills_from_extracted_data(extracted_data)
+
+def extract_info(resume_text: str) -> Dict[str, Any]:
+    """Extract information with improved prompt for projects"""
+    return extract_resume(resume_text)[0]
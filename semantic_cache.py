@@ -0,0 +1,123 @@
+"""Per-resume cache of answers to paraphrased questions.
+
+Each ResumeQASystem owns one SemanticAnswerCache. A question is a hit when
+its embedding has cosine similarity of at least SEMANTIC_CACHE_THRESHOLD
+with a previously answered question, and both questions mention the same
+resume terms. The term check is what stops "Does she know Python?" from
+matching "Does she know Java?", which embed very closely. Role suitability
+questions are not cached at all, since the role and skills they name are
+often absent from the resume and so from the terms. Hit counts and
+the similarity of each hit are collected process-wide in answer_cache_stats
+so that the threshold can be tuned.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+SEMANTIC_CACHE_DISABLED = os.getenv("SEMANTIC_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+
+class SemanticCacheStats:
+    """Hit/miss counts and recent hit similarities across all answer caches"""
+
+    def __init__(self, window: int = 1000):
+        self.hits = 0
+        self.misses = 0
+        self.similarities: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, similarity: Optional[float]):
+        with self._lock:
+            if similarity is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.similarities.append(similarity)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            similarities = sorted(self.similarities)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "hit_similarity_min": similarities[0] if similarities else 0.0,
+            "hit_similarity_p50": similarities[len(similarities) // 2] if similarities else 0.0,
+            "hit_similarity_mean": sum(similarities) / len(similarities) if similarities else 0.0,
+        }
+
+
+answer_cache_stats = SemanticCacheStats()
+
+
+class SemanticAnswerCache:
+    """LRU/TTL cache of (question embedding, resume terms) -> answer for one resume"""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_SIZE,
+                 ttl: float = SEMANTIC_CACHE_TTL, enabled: bool = not SEMANTIC_CACHE_DISABLED):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, FrozenSet[str], str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype="float32")
+        return array / max(float(np.linalg.norm(array)), 1e-12)
+
+    def _expire(self, now: float):
+        expired = [question for question, entry in self._entries.items() if now - entry[3] > self.ttl]
+        for question in expired:
+            del self._entries[question]
+
+    def lookup(self, vector: List[float], terms: FrozenSet[str]) -> Optional[Tuple[str, float]]:
+        """(answer, similarity) of the most similar cached question, or None on a miss"""
+        if not self.enabled:
+            return None
+        query = self._normalize(vector)
+        best: Optional[Tuple[str, float]] = None
+        best_question = None
+        with self._lock:
+            self._expire(time.time())
+            for question, (cached_vector, cached_terms, answer, _) in self._entries.items():
+                if cached_terms != terms:
+                    continue
+                similarity = float(cached_vector @ query)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best, best_question = (answer, similarity), question
+            if best_question is not None:
+                self._entries.move_to_end(best_question)
+        answer_cache_stats.record(best[1] if best else None)
+        return best
+
+    def store(self, question: str, vector: List[float], terms: FrozenSet[str], answer: str):
+        if not self.enabled or not answer or answer.startswith("Error:"):
+            return
+        with self._lock:
+            self._entries[question] = (self._normalize(vector), terms, answer, time.time())
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the cached vectors, questions and answers"""
+        with self._lock:
+            return sum(vector.nbytes + len(question) + len(answer)
+                       for question, (vector, _, answer, _) in self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
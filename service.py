@@ -0,0 +1,272 @@
+"""Headless HTTP service for resume ingestion and question answering.
+
+Usage:
+    python service.py serve --port 8000 --workers 2    # API plus ingestion workers
+    python service.py serve --port 8000 --workers 0    # API only
+    python service.py worker --workers 4               # ingestion workers only
+
+Endpoints:
+    POST /resumes                           upload a PDF/TXT resume (202, or 429 when the queue is full)
+    GET  /resumes/{resume_id}               job status, and the extracted sections and skills when done
+    POST /resumes/{resume_id}/questions     {"question": "...", "stream": false}
+    POST /resumes/{resume_id}/role-suitability  {"role": "..."} or {"question": "..."}
+    GET  /healthz, /metrics
+
+Uploads are queued in the shared JobStore and processed by worker threads
+in any process, on any host, that opens the same SERVICE_DATABASE_URL (by
+default a SQLite file in SERVICE_DATA_DIR, for one host). The resume id
+hashes the file bytes with the parser and embedding versions, so
+re-uploading a resume never processes it twice, and changing
+EMBEDDING_BACKEND or EMBEDDING_MODEL gives new ids instead of indexes that
+no longer load.
+"""
+import argparse
+import os
+import shutil
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from batch_ingest import SUPPORTED_TYPES, ResumeFile
+from embeddings import embedding_version
+from fast_path import router
+from job_store import JobStore, QueueFullError
+from pdf_pages import MAX_PDF_BYTES, PDFLimitError
+from qa_system import ResumeQASystem
+from resume_cache import content_key
+from resume_parser import PARSER_VERSION, iter_resume_pages
+from semantic_cache import answer_cache_stats
+from telemetry import span, telemetry, user_action
+from upload_pipeline import UploadPipeline
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "2"))
+# Loaded per-resume indexes kept in memory for answering questions
+SERVICE_QA_CACHE_SIZE = int(os.getenv("SERVICE_QA_CACHE_SIZE", "16"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1.0"))
+# Seconds a client is asked to wait after a 429
+RETRY_AFTER_SECONDS = 5
+
+_EXTENSIONS = {content_type: extension for extension, content_type in SUPPORTED_TYPES.items()}
+
+
+class NotReadyError(Exception):
+    """The resume exists but has not been processed successfully"""
+
+
+class ResumeService:
+    """Ingestion workers and question answering on top of a shared JobStore"""
+
+    def __init__(self, store: Optional[JobStore] = None, qa_cache_size: int = SERVICE_QA_CACHE_SIZE):
+        self.store = store or JobStore()
+        self.qa_cache_size = qa_cache_size
+        self.version = f"{PARSER_VERSION}/{embedding_version()}"
+        self._qa_systems: "OrderedDict[str, ResumeQASystem]" = OrderedDict()
+        self._qa_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def submit(self, filename: str, content_type: str, data: bytes) -> Dict[str, Any]:
+        """Queue an upload; raises ValueError for unsupported files and QueueFullError when busy"""
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in SUPPORTED_TYPES:
+            if content_type not in _EXTENSIONS:
+                raise ValueError("Only PDF and TXT resumes are supported")
+            filename += _EXTENSIONS[content_type]
+        if len(data) > MAX_PDF_BYTES:
+            raise PDFLimitError(f"File is {len(data) / 1e6:.1f} MB; the limit is {MAX_PDF_BYTES / 1e6:.0f} MB")
+        resume_id = content_key(data, self.version)
+        status = self.store.enqueue(resume_id, filename, SUPPORTED_TYPES[os.path.splitext(filename)[1].lower()],
+                                    data)
+        return {"resume_id": resume_id, "status": status}
+
+    def process_job(self, job: Dict[str, Any], worker: str):
+        """Extract, parse and index one claimed job and store the results"""
+        resume_id = job["resume_id"]
+        pipeline = UploadPipeline(iter_resume_pages(ResumeFile(job["filename"], job["data"])),
+                                  ResumeQASystem(), action="service_ingest").start()
+        # Keep the lease while indexing and extraction run
+        while not pipeline.wait(self.store.lease_seconds / 3):
+            if not self.store.heartbeat(resume_id, worker):
+                # The lease expired and the job went to another worker, which now owns its results
+                return
+        if pipeline.error:
+            raise ValueError(pipeline.error)
+        with span("service.store"):
+            index_dir = os.path.join(self.store.data_dir, f"{resume_id}.tmp-{uuid.uuid4().hex}")
+            pipeline.qa_system.save_knowledge_base(index_dir)
+            try:
+                self.store.complete(resume_id, worker, index_dir, pipeline.resume_text,
+                                    pipeline.extracted_data, pipeline.skills)
+            finally:
+                # complete() moves the directory into the index cache unless the lease was lost
+                shutil.rmtree(index_dir, ignore_errors=True)
+
+    def _worker_loop(self, worker: str):
+        while not self._stop.is_set():
+            job = self.store.claim(worker)
+            if job is None:
+                self._stop.wait(WORKER_POLL_SECONDS)
+                continue
+            try:
+                self.process_job(job, worker)
+            except Exception as e:
+                self.store.fail(job["resume_id"], worker, str(e))
+
+    def start_workers(self, count: int = SERVICE_WORKERS):
+        """Start count ingestion threads; each claims one job at a time from the shared store"""
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        for i in range(count):
+            thread = threading.Thread(target=self._worker_loop, args=(f"{prefix}-{i}",),
+                                      name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def stop_workers(self, timeout: float = 30.0):
+        self._stop.set()
+        for thread in self._workers:
+            thread.join(timeout)
+        self._workers.clear()
+
+    def status(self, resume_id: str, include_text: bool = False) -> Optional[Dict[str, Any]]:
+        job = self.store.get(resume_id)
+        if job is not None and not include_text:
+            job.pop("resume_text", None)
+        return job
+
+    def qa_system(self, resume_id: str) -> ResumeQASystem:
+        """The loaded ResumeQASystem of a processed resume, kept in a small LRU"""
+        with self._qa_lock:
+            qa_system = self._qa_systems.get(resume_id)
+            if qa_system is not None:
+                self._qa_systems.move_to_end(resume_id)
+                return qa_system
+        job = self.store.get(resume_id)
+        if job is None:
+            raise KeyError(resume_id)
+        if job["status"] != "done":
+            raise NotReadyError(f"Resume is {job['status']}" + (f": {job['error']}" if job["error"] else ""))
+        qa_system = ResumeQASystem()
+        qa_system.load_knowledge_base(self.store.load_index(resume_id))
+        qa_system.set_candidate_skills(job["skills"])
+        qa_system.set_extracted_data(job["extracted_data"])
+        with self._qa_lock:
+            self._qa_systems[resume_id] = qa_system
+            while len(self._qa_systems) > self.qa_cache_size:
+                self._qa_systems.popitem(last=False)
+        return qa_system
+
+
+def create_app(service: Optional[ResumeService] = None, workers: int = SERVICE_WORKERS):
+    """Build the FastAPI application; workers ingestion threads start with it"""
+    from fastapi import FastAPI, File, HTTPException, UploadFile
+    from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+    from pydantic import BaseModel
+
+    service = service or ResumeService()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        service.start_workers(workers)
+        yield
+        service.stop_workers()
+
+    app = FastAPI(title="Smart Resume Analyzer", lifespan=lifespan)
+
+    class QuestionRequest(BaseModel):
+        question: str
+        stream: bool = False
+
+    class RoleRequest(BaseModel):
+        role: Optional[str] = None
+        question: Optional[str] = None
+
+    telemetry.register_collector("jobs", service.store.stats)
+    telemetry.register_collector("fast_path", router.stats)
+    telemetry.register_collector("semantic_answer_cache", answer_cache_stats.stats)
+
+    def ready_qa_system(resume_id: str) -> ResumeQASystem:
+        try:
+            return service.qa_system(resume_id)
+        except KeyError:
+            raise HTTPException(404, "Unknown resume")
+        except NotReadyError as e:
+            raise HTTPException(409, str(e))
+
+    @app.post("/resumes", status_code=202)
+    def upload_resume(file: UploadFile = File(...)):
+        data = file.file.read()
+        try:
+            return service.submit(file.filename or "resume", file.content_type or "", data)
+        except QueueFullError as e:
+            return JSONResponse({"detail": str(e)}, status_code=429,
+                                headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+        except PDFLimitError as e:
+            raise HTTPException(413, str(e))
+        except ValueError as e:
+            raise HTTPException(415, str(e))
+
+    @app.get("/resumes/{resume_id}")
+    def get_resume(resume_id: str, include_text: bool = False):
+        job = service.status(resume_id, include_text)
+        if job is None:
+            raise HTTPException(404, "Unknown resume")
+        return job
+
+    @app.post("/resumes/{resume_id}/questions")
+    def ask_question(resume_id: str, request: QuestionRequest):
+        qa_system = ready_qa_system(resume_id)
+        if request.stream:
+            # The generator runs after this handler returns, so it is not counted as a user action
+            return StreamingResponse(qa_system.answer_question_stream(request.question),
+                                     media_type="text/plain; charset=utf-8")
+        with user_action("service_question"):
+            return {"answer": qa_system.answer_question(request.question)}
+
+    @app.post("/resumes/{resume_id}/role-suitability")
+    def role_suitability(resume_id: str, request: RoleRequest):
+        if not request.question and not request.role:
+            raise HTTPException(422, "Provide a role or a question")
+        question = request.question or f"Is this candidate suitable for the role of {request.role}?"
+        qa_system = ready_qa_system(resume_id)
+        with user_action("service_role_suitability"):
+            return {"answer": qa_system.evaluate_role_suitability(question)}
+
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok", "jobs": service.store.stats()}
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["serve", "worker"])
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Ingestion worker threads")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        import uvicorn
+        uvicorn.run(create_app(workers=args.workers), host=args.host, port=args.port)
+        return
+
+    service = ResumeService()
+    service.start_workers(args.workers)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        service.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
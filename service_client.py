@@ -0,0 +1,97 @@
+"""HTTP client of the resume service (service.py), used by the Streamlit app when SERVICE_URL is set."""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Base URL of a running service, e.g. http://resume-service:8000; empty runs everything in-process
+SERVICE_URL = os.getenv("SERVICE_URL", "").rstrip("/")
+SERVICE_TIMEOUT = float(os.getenv("SERVICE_TIMEOUT", "120"))
+POLL_SECONDS = 0.5
+
+
+class ServiceError(Exception):
+    """The service rejected a request, could not be reached, or a resume failed to process"""
+
+
+class ServiceClient:
+    """Upload resumes to the service, wait for them and ask questions about them"""
+
+    def __init__(self, base_url: str = SERVICE_URL, timeout: float = SERVICE_TIMEOUT):
+        # Imported here so the in-process app does not load httpx at startup
+        import httpx
+        self.base_url = base_url
+        self._client = httpx.Client(base_url=base_url, timeout=timeout)
+        self._http_error = httpx.HTTPError
+
+    @contextmanager
+    def _errors(self) -> Iterator[None]:
+        """Raise connection failures and timeouts as ServiceError, like rejected requests"""
+        try:
+            yield
+        except self._http_error as e:
+            raise ServiceError(f"Service at {self.base_url} is unavailable: {e}") from e
+
+    def _check(self, response):
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise ServiceError(f"{response.status_code}: {detail}")
+        return response
+
+    def upload(self, filename: str, data: bytes, content_type: str = "") -> Dict[str, Any]:
+        """Queue a resume; retries while the service answers 429 (queue full)"""
+        deadline = time.monotonic() + self._client.timeout.read
+        while True:
+            with self._errors():
+                response = self._client.post("/resumes", files={"file": (filename, data, content_type or None)})
+            if response.status_code != 429 or time.monotonic() >= deadline:
+                return self._check(response).json()
+            time.sleep(float(response.headers.get("Retry-After", "1")))
+
+    def status(self, resume_id: str, include_text: bool = False) -> Optional[Dict[str, Any]]:
+        """The job of a resume, or None if the service does not know it"""
+        with self._errors():
+            response = self._client.get(f"/resumes/{resume_id}", params={"include_text": include_text})
+        if response.status_code == 404:
+            return None
+        return self._check(response).json()
+
+    def wait_until_processed(self, resume_id: str, include_text: bool = False,
+                             timeout: float = SERVICE_TIMEOUT) -> Dict[str, Any]:
+        """Poll until the resume is done; raises ServiceError if it fails or times out"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.status(resume_id, include_text)
+            if job is None:
+                raise ServiceError(f"Unknown resume {resume_id}")
+            if job["status"] == "done":
+                return job
+            if job["status"] == "error":
+                raise ServiceError(job["error"] or "Resume processing failed")
+            if time.monotonic() >= deadline:
+                raise ServiceError(f"Resume is still {job['status']} after {timeout:.0f}s")
+            time.sleep(POLL_SECONDS)
+
+    def ask_stream(self, resume_id: str, question: str) -> Iterator[str]:
+        """Yield the answer in pieces as the service streams it"""
+        with self._errors(), self._client.stream("POST", f"/resumes/{resume_id}/questions",
+                                                 json={"question": question, "stream": True}) as response:
+            if response.status_code >= 400:
+                response.read()
+                self._check(response)
+            for piece in response.iter_text():
+                if piece:
+                    yield piece
+
+    def ask(self, resume_id: str, question: str) -> str:
+        with self._errors():
+            response = self._client.post(f"/resumes/{resume_id}/questions", json={"question": question})
+        return self._check(response).json()["answer"]
+
+    def role_suitability(self, resume_id: str, role: str) -> str:
+        with self._errors():
+            response = self._client.post(f"/resumes/{resume_id}/role-suitability", json={"role": role})
+        return self._check(response).json()["answer"]
@@ -0,0 +1,180 @@
+"""Process-wide store of the per-session QA systems under a memory budget.
+
+Streamlit keeps session_state for as long as a browser tab stays open, so an
+index kept there stays in memory for as long as the recruiter's tab does.
+Sessions instead hold only a session id, and their ResumeQASystem lives
+here. When the estimated total goes over SESSION_MEMORY_BUDGET_MB, the
+indexes of the least recently used idle sessions are written to disk and
+freed, and reloaded on their next use. Sessions unused for SESSION_IDLE_TTL
+seconds are dropped entirely.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("SESSION_MEMORY_BUDGET_MB", "512"))
+# Parent directory for evicted indexes; the system temp directory by default
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR") or None
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "86400"))
+
+
+class _Session:
+    __slots__ = ("qa_system", "busy", "last_used", "bytes", "in_use", "spilled", "lock")
+
+    def __init__(self, qa_system, busy: Optional[Callable[[], bool]]):
+        self.qa_system = qa_system
+        self.busy = busy
+        self.last_used = time.time()
+        self.bytes = qa_system.memory_bytes()
+        self.in_use = 0
+        self.spilled = False
+        self.lock = threading.Lock()
+
+    def evictable(self) -> bool:
+        return not self.spilled and not self.in_use and not (self.busy is not None and self.busy())
+
+
+class SessionStore:
+    """QA systems by session id, with LRU eviction of idle indexes to disk"""
+
+    def __init__(self, budget_mb: float = SESSION_MEMORY_BUDGET_MB, spill_dir: Optional[str] = SESSION_SPILL_DIR,
+                 idle_ttl: float = SESSION_IDLE_TTL):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.idle_ttl = idle_ttl
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        # Sessions do not survive a restart, so each process spills into its own directory
+        self.spill_dir = tempfile.mkdtemp(prefix="sessions-", dir=spill_dir)
+        atexit.register(shutil.rmtree, self.spill_dir, True)
+        self.evictions = 0
+        self.reloads = 0
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _spill_path(self, session_id: str) -> str:
+        return os.path.join(self.spill_dir, session_id)
+
+    def _drop(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        shutil.rmtree(self._spill_path(session_id), ignore_errors=True)
+
+    def put(self, session_id: str, qa_system, busy: Optional[Callable[[], bool]] = None):
+        """Store the QA system of a session, replacing its previous one.
+
+        busy, if given, returns True while something else still uses the index
+        (e.g. the upload pipeline caching it); such sessions are not evicted.
+        """
+        with self._lock:
+            self._drop(session_id)
+            self._sessions[session_id] = _Session(qa_system, busy)
+        self._enforce_budget()
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._drop(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            return session_id in self._sessions
+
+    @contextmanager
+    def use(self, session_id: str) -> Iterator[Optional[Any]]:
+        """The session's QA system with its index in memory, or None if the session is unknown.
+
+        The session cannot be evicted until the block exits.
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.in_use += 1
+                session.last_used = time.time()
+                self._sessions.move_to_end(session_id)
+        if session is None:
+            yield None
+            return
+        try:
+            with session.lock:
+                reloaded = session.spilled
+                if reloaded:
+                    session.qa_system.reload_knowledge_base(self._spill_path(session_id))
+                    session.spilled = False
+            if reloaded:
+                with self._lock:
+                    self.reloads += 1
+                    session.bytes = session.qa_system.memory_bytes()
+            yield session.qa_system
+        finally:
+            with self._lock:
+                session.in_use -= 1
+                session.bytes = session.qa_system.memory_bytes()
+            self._enforce_budget()
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_ttl
+        expired = [session_id for session_id, session in self._sessions.items()
+                   if session.last_used < cutoff and not session.in_use]
+        for session_id in expired:
+            self._drop(session_id)
+
+    def _enforce_budget(self):
+        """Evict least recently used idle indexes until the total fits the budget.
+
+        Indexes are written to disk without holding the store lock, so other
+        sessions are not held up; only the session being evicted is locked.
+        """
+        with self._lock:
+            total = sum(session.bytes for session in self._sessions.values())
+            victims = []
+            for session_id, session in self._sessions.items():
+                if total <= self.budget_bytes:
+                    break
+                if session.evictable():
+                    victims.append((session_id, session))
+                    total -= session.bytes
+        for session_id, session in victims:
+            with session.lock:
+                with self._lock:
+                    # It may have been used, evicted or replaced since it was chosen. A use()
+                    # starting after this check waits for session.lock and reloads the index.
+                    if self._sessions.get(session_id) is not session or not session.evictable():
+                        continue
+                session.qa_system.offload_knowledge_base(self._spill_path(session_id))
+                with self._lock:
+                    session.spilled = True
+                    session.bytes = session.qa_system.memory_bytes()
+                    self.evictions += 1
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Memory and state of every session, most recently used first"""
+        now = time.time()
+        with self._lock:
+            return [
+                {"session": session_id[:8], "bytes": session.bytes, "resident": not session.spilled,
+                 "idle_seconds": round(now - session.last_used, 1)}
+                for session_id, session in reversed(self._sessions.items())
+            ]
+
+    def session_bytes(self, session_id: str) -> int:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.bytes if session is not None else 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            return {
+                "sessions": len(sessions),
+                "resident": sum(1 for session in sessions if not session.spilled),
+                "bytes": sum(session.bytes for session in sessions),
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+            }
@@ -0,0 +1,49 @@
+import re
+from typing import List, Set
+
+# Common spellings that should count as the same skill
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "sklearn": "scikit-learn",
+}
+
+_LIST_PREFIX = re.compile(r"^\s*(?:[•\-*○·►▪➢]+|\d+[.)])\s*")
+_WHITESPACE = re.compile(r"\s+")
+_SEPARATORS = re.compile(r"[,\n;|]")
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase a skill, strip list markers and map common aliases"""
+    skill = _LIST_PREFIX.sub("", skill)
+    skill = _WHITESPACE.sub(" ", skill).strip(" .:").lower()
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def parse_skill_list(text: str) -> Set[str]:
+    """Split a comma, newline or bullet separated skill list into normalized skills"""
+    skills = set()
+    for part in _SEPARATORS.split(text):
+        # Drop category labels such as "Languages: Python"
+        skill = normalize_skill(part.rsplit(":", 1)[-1])
+        if skill:
+            skills.add(skill)
+    return skills
+
+
+def skills_from_extracted_data(extracted_data) -> List[str]:
+    """Normalized skills from the Technical Skills section of parse_llm_response output"""
+    return sorted(parse_skill_list(extracted_data.get("Technical Skills") or ""))
@@ -0,0 +1,241 @@
+"""Process-wide latency, token usage and cache telemetry.
+
+Stages are timed with ``span("stage")``. LLM calls are recorded by utils.py
+per call site, and every call made inside ``user_action("name")`` is
+counted against that action. Metrics are available as a snapshot dict (for
+the sidebar debug panel), as Prometheus text (served by start_http_server),
+and as a JSON Lines event log when TELEMETRY_LOG is set.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional
+
+TELEMETRY_LOG = os.getenv("TELEMETRY_LOG")
+TELEMETRY_PORT = int(os.getenv("TELEMETRY_PORT", "0"))
+TELEMETRY_DEBUG_PANEL = os.getenv("TELEMETRY_DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+METRIC_PREFIX = "resume_analyzer"
+
+
+class _Stat:
+    """Count, sum and max of a series of observations"""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class _Action:
+    __slots__ = ("name", "llm_calls", "cached_calls")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.llm_calls = 0
+        self.cached_calls = 0
+
+
+_current_action: contextvars.ContextVar[Optional[_Action]] = contextvars.ContextVar("action", default=None)
+
+
+class Telemetry:
+    def __init__(self, log_path: Optional[str] = TELEMETRY_LOG):
+        self.log_path = log_path
+        self.stages: Dict[str, _Stat] = defaultdict(_Stat)
+        self.llm_latency: Dict[str, _Stat] = defaultdict(_Stat)
+        self.llm_ttft: Dict[str, _Stat] = defaultdict(_Stat)
+        self.llm_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.action_calls: Dict[str, _Stat] = defaultdict(_Stat)
+        self.collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def _log(self, event: Dict[str, Any]):
+        if not self.log_path:
+            return
+        event["ts"] = time.time()
+        with self._log_lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+
+    def observe_stage(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage].observe(seconds)
+        self._log({"type": "span", "stage": stage, "seconds": seconds})
+
+    def record_llm_call(self, call_site: str, prompt_chars: int, latency: float,
+                        prompt_tokens: int = 0, completion_tokens: int = 0, cached: bool = False,
+                        ttft: Optional[float] = None):
+        """Record one groq_generate call; cached calls cost no tokens"""
+        action = _current_action.get()
+        with self._lock:
+            counters = self.llm_counters[call_site]
+            if cached:
+                counters["cached_calls"] += 1
+            else:
+                counters["calls"] += 1
+                counters["prompt_tokens"] += prompt_tokens
+                counters["completion_tokens"] += completion_tokens
+                counters["prompt_chars"] += prompt_chars
+                self.llm_latency[call_site].observe(latency)
+                if ttft is not None:
+                    self.llm_ttft[call_site].observe(ttft)
+            if action is not None:
+                if cached:
+                    action.cached_calls += 1
+                else:
+                    action.llm_calls += 1
+        self._log({
+            "type": "llm_call", "call_site": call_site, "cached": cached, "seconds": latency,
+            "ttft": ttft, "prompt_chars": prompt_chars, "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens, "action": action.name if action else None,
+        })
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, float]]):
+        """Add a callable whose numeric results are exported as gauges, e.g. cache stats"""
+        self.collectors[name] = collector
+
+    def _collect(self) -> Dict[str, Dict[str, float]]:
+        values = {}
+        for name, collector in list(self.collectors.items()):
+            try:
+                values[name] = {k: v for k, v in collector().items() if isinstance(v, (int, float))}
+            except Exception:
+                continue
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                "stages": {stage: stat.as_dict() for stage, stat in self.stages.items()},
+                "llm": {
+                    site: {
+                        **counters,
+                        "latency": self.llm_latency[site].as_dict(),
+                        "ttft": self.llm_ttft[site].as_dict(),
+                    }
+                    for site, counters in self.llm_counters.items()
+                },
+                "llm_calls_per_action": {name: stat.as_dict() for name, stat in self.action_calls.items()},
+            }
+        snapshot["collectors"] = self._collect()
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Dict[str, float], label: str):
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for label_value, value in samples.items():
+                escaped = str(label_value).replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{full_name}{{{label}="{escaped}"}} {value}')
+
+        stages = snapshot["stages"]
+        metric("stage_seconds_total", "counter", "Total time spent per stage",
+               {s: v["total"] for s, v in stages.items()}, "stage")
+        metric("stage_count_total", "counter", "Number of times each stage ran",
+               {s: v["count"] for s, v in stages.items()}, "stage")
+        metric("stage_seconds_max", "gauge", "Slowest observed run per stage",
+               {s: v["max"] for s, v in stages.items()}, "stage")
+
+        llm = snapshot["llm"]
+        for counter, help_text in [("calls", "LLM API calls"), ("cached_calls", "LLM calls served from cache"),
+                                   ("prompt_tokens", "Prompt tokens sent"),
+                                   ("completion_tokens", "Completion tokens received"),
+                                   ("prompt_chars", "Prompt characters sent")]:
+            metric(f"llm_{counter}_total", "counter", f"{help_text} per call site",
+                   {site: values.get(counter, 0) for site, values in llm.items()}, "call_site")
+        metric("llm_seconds_total", "counter", "Total LLM latency per call site",
+               {site: values["latency"]["total"] for site, values in llm.items()}, "call_site")
+        metric("llm_ttft_seconds_total", "counter", "Total time to first token of streamed calls",
+               {site: values["ttft"]["total"] for site, values in llm.items()}, "call_site")
+
+        actions = snapshot["llm_calls_per_action"]
+        metric("action_llm_calls_total", "counter", "LLM API calls made by user actions",
+               {a: v["total"] for a, v in actions.items()}, "action")
+        metric("action_count_total", "counter", "Number of user actions",
+               {a: v["count"] for a, v in actions.items()}, "action")
+
+        for name, values in snapshot["collectors"].items():
+            metric(name, "gauge", f"{name} statistics", values, "stat")
+        return "\n".join(lines) + "\n"
+
+
+telemetry = Telemetry()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block and record it under stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        telemetry.observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def user_action(name: str) -> Iterator[_Action]:
+    """Count the LLM calls made while handling one user action"""
+    action = _Action(name)
+    token = _current_action.set(action)
+    try:
+        with span(f"action.{name}"):
+            yield action
+    finally:
+        _current_action.reset(token)
+        with telemetry._lock:
+            telemetry.action_calls[name].observe(action.llm_calls)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body, content_type = telemetry.render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body, content_type = json.dumps(telemetry.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int = TELEMETRY_PORT, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics (Prometheus) and /metrics.json on a background thread"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="telemetry-http", daemon=True).start()
+    return server
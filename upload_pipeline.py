@@ -0,0 +1,183 @@
+"""Concurrent processing of one uploaded resume.
+
+Page text is extracted once and feeds two independent stages. The index
+build (CPU-bound chunking and embedding) consumes pages as they arrive. The
+LLM extraction (network-bound) starts as soon as the full text is known.
+Each stage keeps its own status and progress, so the UI can enable the Q&A
+tab once the index is ready and the breakdown tab once extraction is done.
+Together they take as long as the slower stage, not the sum of both.
+"""
+import contextvars
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from resume_parser import extract_resume
+from telemetry import span, user_action
+
+STAGES = ("text", "index", "extraction")
+
+_DONE = object()
+
+
+class StageProgress:
+    """Status (pending, running, done or error) and progress of one pipeline stage"""
+
+    __slots__ = ("status", "completed", "total", "error", "started", "finished")
+
+    def __init__(self):
+        self.status = "pending"
+        self.completed = 0
+        self.total: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def fraction(self) -> float:
+        if self.status == "done":
+            return 1.0
+        return min(self.completed / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+
+class UploadPipeline:
+    """Extract text, build the index of qa_system and run LLM extraction concurrently.
+
+    The whole run is one user action named action. on_complete is called
+    with the pipeline from a worker thread once every stage has succeeded,
+    e.g. to store the result in the resume cache.
+    """
+
+    def __init__(self, pages: Iterable[str], qa_system,
+                 on_complete: Optional[Callable[["UploadPipeline"], None]] = None, action: str = "upload"):
+        self.qa_system = qa_system
+        self.on_complete = on_complete
+        self.action = action
+        self.stages: Dict[str, StageProgress] = {name: StageProgress() for name in STAGES}
+        self.resume_text: Optional[str] = None
+        self.extracted_data: Optional[Dict[str, Any]] = None
+        self.skills: Optional[List[str]] = None
+        self._pages = pages
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _thread_in_context(target: Callable[[], None], name: str) -> threading.Thread:
+        # A copy of the current context, so LLM calls made by the thread count against the user action
+        context = contextvars.copy_context()
+        return threading.Thread(target=context.run, args=(target,), name=name, daemon=True)
+
+    def start(self) -> "UploadPipeline":
+        """Run the pipeline in the background and return immediately"""
+        self._thread = self._thread_in_context(self._run, "upload-pipeline")
+        self._thread.start()
+        return self
+
+    def _run(self):
+        with user_action(self.action):
+            index_thread = self._thread_in_context(self._build_index, "upload-index")
+            index_thread.start()
+            if self._read_text():
+                self._extract()
+            index_thread.join()
+
+    def _begin(self, name: str):
+        with self._lock:
+            stage = self.stages[name]
+            stage.status = "running"
+            stage.started = time.perf_counter()
+
+    def _finish(self, name: str, error: Optional[str] = None):
+        with self._lock:
+            stage = self.stages[name]
+            stage.status = "error" if error else "done"
+            stage.error = error
+            stage.finished = time.perf_counter()
+            complete = all(stage.status == "done" for stage in self.stages.values())
+            if complete:
+                # Applied only now so that the index build cannot reset them
+                self.qa_system.set_candidate_skills(self.skills)
+                self.qa_system.set_extracted_data(self.extracted_data)
+        if complete and self.on_complete is not None:
+            self.on_complete(self)
+
+    def _read_text(self) -> bool:
+        self._begin("text")
+        texts = []
+        try:
+            with span("upload.text"):
+                for page in self._pages:
+                    self._queue.put(page)
+                    if page:
+                        texts.append(page)
+                    with self._lock:
+                        self.stages["text"].completed += 1
+        except Exception as e:
+            # Marked failed before the index build sees the end of the pages
+            self._finish("text", str(e))
+            self._finish("extraction", "Text extraction failed")
+            self._queue.put(_DONE)
+            return False
+        self.resume_text = " ".join(texts)
+        with self._lock:
+            self.stages["text"].total = self.stages["index"].total = self.stages["text"].completed
+        self._queue.put(_DONE)
+        self._finish("text")
+        return True
+
+    def _extract(self):
+        self._begin("extraction")
+        try:
+            with span("upload.extraction"):
+                self.extracted_data, self.skills = extract_resume(self.resume_text)
+        except Exception as e:
+            self._finish("extraction", str(e))
+            return
+        self._finish("extraction")
+
+    def _page_indexed(self, count: int):
+        with self._lock:
+            self.stages["index"].completed = count
+
+    def _build_index(self):
+        self._begin("index")
+        try:
+            with span("upload.index"):
+                self.qa_system.create_knowledge_base_from_pages(iter(self._queue.get, _DONE),
+                                                                on_page=self._page_indexed)
+        except Exception as e:
+            self._finish("index", str(e))
+            return
+        if self.stages["text"].status == "error":
+            self._finish("index", "Text extraction failed")
+        elif self.qa_system.db is None:
+            self._finish("index", "No text could be extracted from the resume")
+        else:
+            self._finish("index")
+
+    def ready(self, name: str) -> bool:
+        return self.stages[name].status == "done"
+
+    @property
+    def finished(self) -> bool:
+        """True once every stage has succeeded or failed and on_complete has returned"""
+        return self._thread is not None and not self._thread.is_alive()
+
+    @property
+    def error(self) -> Optional[str]:
+        """Error of the first failed stage, or None"""
+        return next((stage.error for stage in self.stages.values() if stage.status == "error"), None)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the pipeline has finished or timeout passes; return finished"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
@@ -1,22 +1,393 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
 import os
-import groq
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from prompt_budget import fit_request, output_budget
+from llm_cache import NullResponseCache, ResponseCache, SQLiteResponseCache, make_cache_key
+from rate_limit import RateLimiter, backoff_delay, estimate_tokens
+from telemetry import telemetry
 
 # Set up Groq API key
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-# Initialize Groq client
-groq_client = groq.Client(api_key=GROQ_API_KEY)
+# Connection pool, quota and retry settings
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "5000"))
+
+# Created by get_client on the first LLM call, so importing this module stays cheap
+groq_client: Any = None
+_client_lock = threading.Lock()
+
+# Shared by every sync and async call in the process
+rate_limiter = RateLimiter(GROQ_RPM, GROQ_TPM)
+
+# Default generation parameters
+GROQ_MODEL = "mixtral-8x7b-32768"
+TEMPERATURE = 0.5
+MAX_TOKENS = 4096
+TOP_P = 0.9
+
+# Returned instead of a completion that was cut off at max_tokens, which is never cached
+TRUNCATED_ERROR = "Error: the response was cut off at max_tokens"
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Groq errors worth retrying; only evaluated once a call has failed"""
+    import groq
+    return (
+        groq.RateLimitError,
+        groq.APITimeoutError,
+        groq.APIConnectionError,
+        groq.InternalServerError,
+    )
+
+def get_client():
+    """Return the pooled Groq client, creating it on first use"""
+    global groq_client
+    if groq_client is None:
+        with _client_lock:
+            if groq_client is None:
+                import groq
+                import httpx
+                # Retries are handled here rather than by the SDK
+                groq_client = groq.Client(
+                    api_key=GROQ_API_KEY,
+                    max_retries=0,
+                    http_client=httpx.Client(
+                        timeout=GROQ_TIMEOUT,
+                        limits=httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS,
+                                            max_keepalive_connections=GROQ_MAX_CONNECTIONS)
+                    )
+                )
+    return groq_client
+
+# Set GROQ_CACHE_DISABLED=1 to turn off response caching for the whole process
+if os.getenv("GROQ_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+    response_cache: ResponseCache = NullResponseCache()
+else:
+    response_cache = SQLiteResponseCache()
+
+def set_response_cache(cache: ResponseCache):
+    """Replace the response cache used by groq_generate"""
+    global response_cache
+    response_cache = cache
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header of a rate-limit response, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _request_params(prompt: str, model: str, temperature: float, max_tokens: int,
+                    top_p: float) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "top_p": top_p,
+    }
+
+def _fit(prompt: str, max_tokens: Optional[int], call_site: str) -> Tuple[str, int]:
+    """Resolve the completion budget for call_site and fit the request into the model context"""
+    if max_tokens is None:
+        max_tokens = output_budget.max_tokens_for(call_site)
+    return fit_request(prompt, min(max_tokens, MAX_TOKENS))
+
+def _usage_tokens(usage) -> Tuple[int, int]:
+    """(prompt tokens, completion tokens) reported by the API, or zeros"""
+    return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
 
-def groq_generate(prompt: str) -> str:
-    """Send the prompt to Groq's API and get a response from Mixtral."""
+def groq_generate(prompt: str, model: str = GROQ_MODEL, temperature: float = TEMPERATURE,
+                  max_tokens: Optional[int] = None, top_p: float = TOP_P, use_cache: bool = True,
+                  call_site: str = "unknown", response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Send the prompt to Groq's API and get a response from Mixtral.
+
+    Identical requests are served from the response cache unless use_cache is False.
+    Rate-limit and transient errors are retried with jittered exponential backoff.
+    Latency and token usage are recorded in telemetry under call_site. When
+    max_tokens is None it is chosen from the completion sizes observed for
+    call_site, and oversized prompts are shortened to fit the model context.
+    response_format is passed through to the API, e.g. {"type": "json_object"}.
+    """
+    start = time.perf_counter()
+    requested = (prompt, max_tokens)
+    prompt, max_tokens = _fit(prompt, max_tokens, call_site)
+    # Only non-default options join the cache key, so existing entries stay valid
+    options = {"response_format": response_format} if response_format else {}
+    cache_key = make_cache_key(prompt, model=model, temperature=temperature,
+                               max_tokens=max_tokens, top_p=top_p, **options)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            telemetry.record_llm_call(call_site, len(prompt), time.perf_counter() - start, cached=True)
+            return cached
+
+    params = _request_params(prompt, model, temperature, max_tokens, top_p)
+    params.update(options)
+    reserved = estimate_tokens(prompt)
     try:
-        response = groq_client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
-            max_tokens=4096,
-            top_p=0.9
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            rate_limiter.acquire(reserved)
+            try:
+                response = get_client().chat.completions.create(**params)
+                break
+            except Exception as e:
+                # A failed request uses no tokens, and the next attempt reserves them again
+                rate_limiter.refund(reserved)
+                if attempt == GROQ_MAX_RETRIES or not isinstance(e, retryable_errors()):
+                    raise
+                time.sleep(backoff_delay(attempt, retry_after=_retry_after(e)))
+        prompt_tokens, completion_tokens = _usage_tokens(response.usage)
+        rate_limiter.record_usage(reserved, prompt_tokens + completion_tokens)
+        content = response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+    truncated = getattr(response.choices[0], "finish_reason", None) == "length"
+    output_budget.observe(call_site, completion_tokens, truncated=truncated)
+    telemetry.record_llm_call(call_site, len(prompt), time.perf_counter() - start,
+                              prompt_tokens, completion_tokens)
+    if truncated:
+        # A cap learned by output_budget was too small, so try once more with the full cap
+        if requested[1] is None and max_tokens < MAX_TOKENS:
+            return groq_generate(requested[0], model, temperature, MAX_TOKENS, top_p, use_cache,
+                                 call_site, response_format)
+        return TRUNCATED_ERROR
+
+    # Errors are returned as plain strings, so never cache anything that looks like one
+    if use_cache and not content.startswith("Error:"):
+        response_cache.set(cache_key, content)
+    return content
+
+# Time-to-first-token and total time of recent streamed requests, newest last
+stream_timings: Deque[Dict[str, float]] = deque(maxlen=1000)
+
+def groq_generate_stream(prompt: str, model: str = GROQ_MODEL, temperature: float = TEMPERATURE,
+                         max_tokens: Optional[int] = None, top_p: float = TOP_P,
+                         use_cache: bool = True, call_site: str = "unknown") -> Iterator[str]:
+    """Streaming version of groq_generate that yields text as it arrives.
+
+    A cached response is yielded in one piece. Completed streams are cached
+    like ordinary responses, and their timings are appended to stream_timings.
+    A stream cut off at max_tokens ends with a TRUNCATED_ERROR piece instead.
+    """
+    prompt, max_tokens = _fit(prompt, max_tokens, call_site)
+    cache_key = make_cache_key(prompt, model=model, temperature=temperature,
+                               max_tokens=max_tokens, top_p=top_p)
+    start = time.perf_counter()
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            telemetry.record_llm_call(call_site, len(prompt), time.perf_counter() - start, cached=True)
+            yield cached
+            return
+
+    params = _request_params(prompt, model, temperature, max_tokens, top_p)
+    reserved = estimate_tokens(prompt)
+    first_token = None
+    usage = None
+    finish_reason = None
+    parts = []
+    try:
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            rate_limiter.acquire(reserved)
+            try:
+                stream = get_client().chat.completions.create(stream=True, **params)
+                break
+            except Exception as e:
+                rate_limiter.refund(reserved)
+                if attempt == GROQ_MAX_RETRIES or not isinstance(e, retryable_errors()):
+                    raise
+                time.sleep(backoff_delay(attempt, retry_after=_retry_after(e)))
+
+        for chunk in stream:
+            # Groq reports usage on the final chunk of a stream
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+            if not chunk.choices:
+                continue
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                # Match groq_generate, which strips the complete response
+                delta = delta.lstrip()
+            parts.append(delta)
+            yield delta
+    except Exception as e:
+        yield f"Error: {str(e)}"
+        return
+
+    content = "".join(parts).strip()
+    total = time.perf_counter() - start
+    ttft = first_token if first_token is not None else total
+    stream_timings.append({
+        "ttft": ttft,
+        "total": total,
+        "chars": len(content),
+    })
+    if usage is not None:
+        prompt_tokens, completion_tokens = _usage_tokens(usage)
+    else:
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(content)
+    rate_limiter.record_usage(reserved, prompt_tokens + completion_tokens)
+    output_budget.observe(call_site, completion_tokens, truncated=finish_reason == "length")
+    telemetry.record_llm_call(call_site, len(prompt), total, prompt_tokens, completion_tokens, ttft=ttft)
+    if finish_reason == "length":
+        # The text already shown cannot be taken back, but it is neither cached here nor by the caller
+        yield f"\n\n{TRUNCATED_ERROR}"
+        return
+    if use_cache and content and not content.startswith("Error:"):
+        response_cache.set(cache_key, content)
+
+# One async client per event loop, since httpx async pools cannot be shared across loops
+_async_clients: Dict[int, Any] = {}
+_async_client_factory: Optional[Callable[[], Any]] = None
+
+def use_clients(sync_client: Any, async_client_factory: Optional[Callable[[], Any]] = None):
+    """Replace the Groq clients, e.g. with the offline stub used by the benchmarks"""
+    global groq_client, _async_client_factory
+    groq_client = sync_client
+    _async_client_factory = async_client_factory
+    _async_clients.clear()
+
+def get_async_client():
+    """Return the pooled async Groq client for the running event loop"""
+    if _async_client_factory is not None:
+        return _async_client_factory()
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(id(loop))
+    if client is None:
+        import groq
+        import httpx
+        client = groq.AsyncClient(
+            api_key=GROQ_API_KEY,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=GROQ_TIMEOUT,
+                limits=httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS,
+                                    max_keepalive_connections=GROQ_MAX_CONNECTIONS)
+            )
         )
-        return response.choices[0].message.content.strip()
+        _async_clients[id(loop)] = client
+    return client
+
+async def close_async_client():
+    """Close the async client of the running event loop"""
+    client = _async_clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.close()
+
+async def agroq_generate(prompt: str, model: str = GROQ_MODEL, temperature: float = TEMPERATURE,
+                         max_tokens: Optional[int] = None, top_p: float = TOP_P,
+                         use_cache: bool = True, call_site: str = "unknown",
+                         response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Async version of groq_generate sharing its cache, rate limiter, retry policy and telemetry"""
+    start = time.perf_counter()
+    requested = (prompt, max_tokens)
+    prompt, max_tokens = _fit(prompt, max_tokens, call_site)
+    # Only non-default options join the cache key, so existing entries stay valid
+    options = {"response_format": response_format} if response_format else {}
+    cache_key = make_cache_key(prompt, model=model, temperature=temperature,
+                               max_tokens=max_tokens, top_p=top_p, **options)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            telemetry.record_llm_call(call_site, len(prompt), time.perf_counter() - start, cached=True)
+            return cached
+
+    params = _request_params(prompt, model, temperature, max_tokens, top_p)
+    params.update(options)
+    reserved = estimate_tokens(prompt)
+    try:
+        client = get_async_client()
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            await rate_limiter.acquire_async(reserved)
+            try:
+                response = await client.chat.completions.create(**params)
+                break
+            except Exception as e:
+                rate_limiter.refund(reserved)
+                if attempt == GROQ_MAX_RETRIES or not isinstance(e, retryable_errors()):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, retry_after=_retry_after(e)))
+        prompt_tokens, completion_tokens = _usage_tokens(response.usage)
+        rate_limiter.record_usage(reserved, prompt_tokens + completion_tokens)
+        content = response.choices[0].message.content.strip()
     except Exception as e:
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+    truncated = getattr(response.choices[0], "finish_reason", None) == "length"
+    output_budget.observe(call_site, completion_tokens, truncated=truncated)
+    telemetry.record_llm_call(call_site, len(prompt), time.perf_counter() - start,
+                              prompt_tokens, completion_tokens)
+    if truncated:
+        if requested[1] is None and max_tokens < MAX_TOKENS:
+            return await agroq_generate(requested[0], model, temperature, MAX_TOKENS, top_p, use_cache,
+                                        call_site, response_format)
+        return TRUNCATED_ERROR
+
+    if use_cache and not content.startswith("Error:"):
+        response_cache.set(cache_key, content)
+    return content
+
+async def agroq_generate_batch(prompts: List[str], max_concurrency: int = GROQ_MAX_CONNECTIONS,
+                               call_sites: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+    """Run many prompts concurrently and return the responses in the same order.
+    call_sites gives each prompt its own call site instead of the shared call_site."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(prompt: str, options: Dict[str, Any]) -> str:
+        async with semaphore:
+            return await agroq_generate(prompt, **options)
+
+    if call_sites is None:
+        return await asyncio.gather(*(run(prompt, kwargs) for prompt in prompts))
+    return await asyncio.gather(*(run(prompt, {**kwargs, "call_site": call_site})
+                                  for prompt, call_site in zip(prompts, call_sites)))
+
+# Event loop of groq_generate_batch, kept running in a background thread so that
+# its async client and connection pool are reused by every synchronous batch
+_batch_loop: Optional[asyncio.AbstractEventLoop] = None
+_batch_loop_lock = threading.Lock()
+
+def _get_batch_loop() -> asyncio.AbstractEventLoop:
+    global _batch_loop
+    with _batch_loop_lock:
+        if _batch_loop is None:
+            _batch_loop = asyncio.new_event_loop()
+            threading.Thread(target=_batch_loop.run_forever, name="groq-batch-loop", daemon=True).start()
+        return _batch_loop
+
+def groq_generate_batch(prompts: List[str], **kwargs: Any) -> List[str]:
+    """Blocking wrapper around agroq_generate_batch for synchronous callers"""
+    loop = _get_batch_loop()
+    result: "concurrent.futures.Future[List[str]]" = concurrent.futures.Future()
+
+    def finish(task: asyncio.Task):
+        if task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+
+    def start():
+        loop.create_task(agroq_generate_batch(prompts, **kwargs)).add_done_callback(finish)
+
+    # Started in a copy of the caller's context, so the calls count against its user action
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return result.result()